@@ -0,0 +1,222 @@
+import os
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+from app.response_cache import normalize_message, history_digest
+from app.telemetry import admission_outcomes
+
+# Admission control in front of the upstream chat call.
+# Bursts (a class ending, everyone asking at once) used to fan out into an
+# unbounded number of upstream requests; once the upstream started answering
+# 429, every one of them failed slowly together. Now:
+#   - identical prompts already in flight share one upstream call
+#   - each client address has a token bucket, so one client cannot crowd out
+#     the rest
+#   - at most `max_concurrency` calls run at once; the rest wait in a queue
+#     served round-robin across addresses
+#   - a request whose predicted (or actual) wait runs past its deadline, or
+#     that arrives while the upstream has told us to back off, is not queued:
+#     the caller answers it with the local fallback straight away
+#
+# The bucket is per address because the API has no verified user id to key
+# on (sessionId and userId come from the client and cost nothing to change).
+# One address can be a whole gym on one NAT - the class-ending burst itself -
+# so the defaults are sized for a room, about 30 people asking at once and
+# then one question a second between them. That is loose for a single abusive
+# host; the shared concurrency limit, queue deadline and upstream cooldown are
+# what protect the upstream. Deployments that only see individual clients
+# can lower ADMISSION_USER_BURST / ADMISSION_USER_RATE.
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+class Waiter:
+    __slots__ = ("user", "future")
+
+    def __init__(self, user: str, future: asyncio.Future):
+        self.user = user
+        self.future = future
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_concurrency: int = 16,
+        queue_deadline: float = 1.5,
+        user_rate: float = 1.0,
+        user_burst: float = 30.0,
+        max_users: int = 10000,
+        max_cooldown: float = 10.0
+    ):
+        self.max_concurrency = max_concurrency
+        self.queue_deadline = queue_deadline
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.max_users = max_users
+        self.max_cooldown = max_cooldown
+
+        self.buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        # user -> their waiters; iteration order is the round-robin order
+        self.queues: "OrderedDict[str, Deque[Waiter]]" = OrderedDict()
+        self.waiting = 0
+        self.active = 0
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self.cooldown_until = 0.0
+        # Smoothed upstream call duration, used to predict queue waits
+        self.call_seconds = 1.0
+        self.outcomes: Dict[str, int] = {}
+
+    # -------------------------------------------------- rate limiting
+
+    def _take_token(self, user: str) -> bool:
+        now = time.monotonic()
+        bucket = self.buckets.get(user)
+        if bucket is None:
+            bucket = self.buckets[user] = TokenBucket(self.user_burst, now)
+            while len(self.buckets) > self.max_users:
+                self.buckets.popitem(last=False)
+        else:
+            bucket.tokens = min(self.user_burst, bucket.tokens + (now - bucket.updated) * self.user_rate)
+            bucket.updated = now
+            self.buckets.move_to_end(user)
+        if bucket.tokens < 1:
+            return False
+        bucket.tokens -= 1
+        return True
+
+    def note_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        # The upstream said 429: stop sending for a while instead of queueing
+        # more calls that will fail the same way
+        pause = min(retry_after if retry_after is not None else 1.0, self.max_cooldown)
+        self.cooldown_until = max(self.cooldown_until, time.monotonic() + pause)
+
+    # -------------------------------------------------- fair queue
+
+    async def _acquire(self, user: str, deadline: float) -> bool:
+        if self.active < self.max_concurrency and not self.waiting:
+            self.active += 1
+            return True
+
+        # Refuse up front when the queue ahead would outlast the deadline
+        expected_wait = (self.waiting // self.max_concurrency + 1) * self.call_seconds
+        if time.monotonic() + expected_wait > deadline:
+            return False
+
+        waiter = Waiter(user, asyncio.get_running_loop().create_future())
+        self.queues.setdefault(user, deque()).append(waiter)
+        self.waiting += 1
+        try:
+            return await asyncio.wait_for(waiter.future, max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            queue = self.queues.get(user)
+            if queue is not None and waiter in queue:
+                queue.remove(waiter)
+                self.waiting -= 1
+                if not queue:
+                    del self.queues[user]
+
+    def _release(self) -> None:
+        self.active -= 1
+        while self.active < self.max_concurrency and self.queues:
+            user, queue = next(iter(self.queues.items()))
+            waiter = queue.popleft()
+            self.waiting -= 1
+            # Next turn goes to the next user in line
+            if queue:
+                self.queues.move_to_end(user)
+            else:
+                del self.queues[user]
+            if not waiter.future.done():
+                self.active += 1
+                waiter.future.set_result(True)
+
+    # -------------------------------------------------- entry point
+
+    def _record(self, outcome: str) -> None:
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        admission_outcomes.inc(outcome)
+
+    async def run(self, user: str, prompt_key: str, call: Callable[[], Awaitable[Optional[str]]]) -> Optional[str]:
+        # Returns the upstream answer, or None when the caller should degrade
+        deadline = time.monotonic() + self.queue_deadline
+
+        shared = self.inflight.get(prompt_key)
+        if shared is not None:
+            self._record("shared")
+            try:
+                # shield: one waiter giving up must not cancel the shared call
+                return await asyncio.wait_for(asyncio.shield(shared), self.call_seconds * 2 + self.queue_deadline)
+            except asyncio.TimeoutError:
+                self._record("shared_timeout")
+                return None
+
+        if not self._take_token(user):
+            self._record("rate_limited")
+            return None
+        if time.monotonic() < self.cooldown_until:
+            self._record("upstream_cooldown")
+            return None
+
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[prompt_key] = future
+        try:
+            if not await self._acquire(user, deadline):
+                self._record("deadline")
+                future.set_result(None)
+                return None
+            try:
+                started = time.monotonic()
+                result = await call()
+                self.call_seconds = 0.8 * self.call_seconds + 0.2 * (time.monotonic() - started)
+            finally:
+                self._release()
+            self._record("admitted")
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            # The leader's client went away; joiners degrade rather than fail
+            if not future.done():
+                future.set_result(None)
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Joiners re-raise it; mark retrieved so a lone failure is not logged as unhandled
+            future.exception()
+            raise
+        finally:
+            self.inflight.pop(prompt_key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "inflightPrompts": len(self.inflight),
+            "callMs": round(self.call_seconds * 1000, 1),
+            "coolingDown": time.monotonic() < self.cooldown_until,
+            "outcomes": dict(self.outcomes)
+        }
+
+def prompt_key(message: str, language: Optional[str], conversation_history: List[Dict[str, str]]) -> str:
+    raw = f"{language or ''}\x00{normalize_message(message)}\x00{history_digest(conversation_history)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+def controller_from_env() -> Optional[AdmissionController]:
+    if os.getenv("ADMISSION_ENABLED", "true").lower() != "true":
+        return None
+    return AdmissionController(
+        max_concurrency=int(os.getenv("ADMISSION_MAX_CONCURRENCY", "16")),
+        queue_deadline=float(os.getenv("ADMISSION_QUEUE_DEADLINE_MS", "1500")) / 1000,
+        user_rate=float(os.getenv("ADMISSION_USER_RATE", "1.0")),
+        user_burst=float(os.getenv("ADMISSION_USER_BURST", "30")),
+        max_users=int(os.getenv("ADMISSION_MAX_USERS", "10000")),
+        max_cooldown=float(os.getenv("ADMISSION_MAX_COOLDOWN_SECONDS", "10"))
+    )
+
+admission_controller = controller_from_env()
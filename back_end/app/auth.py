@@ -1,19 +1,20 @@
-import os
 import re
-from typing import Optional, Dict, Any
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
-from supabase import create_client, Client
-from dotenv import load_dotenv
+import asyncio
+import logging
+from typing import Optional, Dict, Any, List
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from pydantic import BaseModel, Field
+from app.profile_repository import repository_from_env
+from app.profile_cache import profile_cache
+from app.profile_writer import coalescer_from_env
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Supabase configuration
-url: str = os.environ.get("SUPABASE_URL", "")
-key: str = os.environ.get("SUPABASE_ANON_KEY", "")
-supabase: Client = create_client(url, key)
+# Supabase client is created lazily by the repository (see profile_repository)
+profile_repository = repository_from_env()
+profile_writer = coalescer_from_env(profile_repository)
 
 class UserProfile(BaseModel):
     id: str
@@ -30,6 +31,29 @@ class UserProfile(BaseModel):
     feedbackPreference: Optional[str] = None
     onboardingCompleted: bool = False
 
+# Bounds one `id=in.(...)` query and one call's share of the write coalescer
+MAX_BATCH_PROFILES = 100
+
+class ProfileBatchRequest(BaseModel):
+    read: List[str] = Field(default_factory=list, max_length=MAX_BATCH_PROFILES)
+    write: Dict[str, Dict[str, Any]] = Field(default_factory=dict, max_length=MAX_BATCH_PROFILES)
+
+# Strict mapping from Frontend (camelCase) to Database (snake_case)
+# We must NOT send keys that don't exist in the table, or Supabase will error.
+PROFILE_FIELD_MAPPING = {
+    "firstName": "first_name",
+    "lastName": "last_name",
+    "gender": "gender",
+    "age": "age",
+    "height": "height",
+    "weight": "weight",
+    "workoutFrequency": "workout_frequency",
+    "experienceLevel": "experience_level",
+    "injury": "injury",
+    "feedbackPreference": "feedback_preference",
+    "onboardingCompleted": "onboarding_completed"
+}
+
 def clean_name(name: str) -> str:
     return re.sub(r'[^a-zA-Z]', '', name)
 
@@ -48,61 +72,95 @@ def extract_name_from_email(email: str) -> Dict[str, str]:
     
     return {"firstName": first_name, "lastName": last_name}
 
-@router.get("/profile/{user_id}")
-async def fetch_user_profile(user_id: str):
-    print(f"Fetching profile for user: {user_id}")
-    try:
-        response = supabase.table("profiles").select("*").eq("id", user_id).execute()
-        data = response.data
-        
-        if not data:
-            print(f"No profile found for user: {user_id}")
-            return None
-        
-        data = data[0] if isinstance(data, list) and len(data) > 0 else data
-        if not data:
-            return None
+def to_api_profile(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": data.get("id"),
+        "firstName": data.get("first_name") or data.get("firstName") or "User",
+        "lastName": data.get("last_name") or data.get("lastName") or "",
+        "email": data.get("email"),
+        "gender": data.get("gender"),
+        "age": data.get("age"),
+        "height": data.get("height"),
+        "weight": data.get("weight"),
+        "workoutFrequency": data.get("workout_frequency") or data.get("workoutFrequency"),
+        "experienceLevel": data.get("experience_level") or data.get("experienceLevel"),
+        "injury": data.get("injury"),
+        "feedbackPreference": data.get("feedback_preference") or data.get("feedbackPreference"),
+        "onboardingCompleted": data.get("onboarding_completed") or data.get("onboardingCompleted", False)
+    }
+
+async def backfill_name(user_id: str, data: Dict[str, Any]) -> None:
+    # Automatic Name Extraction logic
+    first_name = data.get("first_name")
+    email = data.get("email")
+    
+    if (not first_name or first_name == "User") and email:
+        extracted = extract_name_from_email(email)
+        first_name = extracted["firstName"]
+        last_name = data.get("last_name") or extracted["lastName"]
         
-        # Automatic Name Extraction logic
-        first_name = data.get("first_name")
-        email = data.get("email")
+        # Coalesced with any other pending writes into a shared upsert
+        await profile_writer.submit(user_id, {
+            "first_name": first_name,
+            "last_name": last_name
+        })
         
-        if (not first_name or first_name == "User") and email:
-            extracted = extract_name_from_email(email)
-            first_name = extracted["firstName"]
-            last_name = data.get("last_name") or extracted["lastName"]
-            
-            # Update DB immediately
-            supabase.table("profiles").update({
-                "first_name": first_name,
-                "last_name": last_name
-            }).eq("id", user_id).execute()
-            
-            data["first_name"] = first_name
-            data["last_name"] = last_name
-
-        return {
-            "id": data.get("id"),
-            "firstName": data.get("first_name") or data.get("firstName") or "User",
-            "lastName": data.get("last_name") or data.get("lastName") or "",
-            "email": data.get("email"),
-            "gender": data.get("gender"),
-            "age": data.get("age"),
-            "height": data.get("height"),
-            "weight": data.get("weight"),
-            "workoutFrequency": data.get("workout_frequency") or data.get("workoutFrequency"),
-            "experienceLevel": data.get("experience_level") or data.get("experienceLevel"),
-            "injury": data.get("injury"),
-            "feedbackPreference": data.get("feedback_preference") or data.get("feedbackPreference"),
-            "onboardingCompleted": data.get("onboarding_completed") or data.get("onboardingCompleted", False)
-        }
+        data["first_name"] = first_name
+        data["last_name"] = last_name
+
+async def load_user_profile(user_id: str) -> Optional[Dict[str, Any]]:
+    data = await profile_repository.fetch(user_id)
+    
+    if not data:
+        logger.info("profile not found", extra={"user_id": user_id})
+        return None
+    
+    await backfill_name(user_id, data)
+    return to_api_profile(data)
+
+async def load_user_profiles(user_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    # One `id=in.(...)` query for all requested users
+    rows = await profile_repository.fetch_many(user_ids) if user_ids else []
+    by_id = {str(row.get("id")): row for row in rows}
+    await asyncio.gather(*(backfill_name(user_id, row) for user_id, row in by_id.items()))
+    return {user_id: to_api_profile(by_id[user_id]) if user_id in by_id else None for user_id in user_ids}
+
+def map_profile_update(profile_update: Dict[str, Any]) -> Dict[str, Any]:
+    db_update = {}
+    for key, value in profile_update.items():
+        # If key is in our mapping, translate it
+        if key in PROFILE_FIELD_MAPPING:
+            db_update[PROFILE_FIELD_MAPPING[key]] = value
+        # Handle special case if it comes in as weeklyWorkoutFrequency
+        elif key == "weeklyWorkoutFrequency":
+            db_update["workout_frequency"] = value
+        # If the key is ALREADY snake_case (e.g. from a raw payload), utilize it if it's a valid column
+        # For safety, we only accept keys that match the values in our mapping or are clearly intended
+        elif key in PROFILE_FIELD_MAPPING.values():
+            db_update[key] = value
+    return db_update
+
+@router.get("/profile/{user_id}")
+async def fetch_user_profile(user_id: str, request: Request, response: Response):
+    try:
+        profile, etag = await profile_cache.get_or_load(user_id, load_user_profile)
     except Exception as e:
-        print(f"Error fetching profile: {e}")
+        logger.exception("profile fetch failed", extra={"user_id": user_id})
         raise HTTPException(status_code=500, detail=str(e))
+    
+    if profile is None:
+        return None
+    
+    # Unchanged since the client's copy: no body needed
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return profile
 
 @router.post("/profile")
 async def create_user_profile(profile: UserProfile):
-    print(f"Creating profile for: {profile.id} ({profile.email})")
     try:
         data = {
             "id": profile.id,
@@ -111,59 +169,46 @@ async def create_user_profile(profile: UserProfile):
             "email": profile.email,
             "onboarding_completed": False
         }
-        print(f"Upserting data: {data}")
-        response = supabase.table("profiles").upsert(data).execute()
-        print(f"Upsert response: {response.data}")
-        return response.data
+        response_data = await profile_repository.upsert(data)
+        profile_cache.invalidate(profile.id)
+        return response_data
     except Exception as e:
-        print(f"Error creating profile: {e}")
+        logger.exception("profile create failed", extra={"user_id": profile.id})
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.patch("/profile/{user_id}")
 async def update_user_profile(user_id: str, profile_update: Dict[str, Any]):
-    print(f"Updating profile for user {user_id}: {profile_update}")
     try:
-        # Strict mapping from Frontend (camelCase) to Database (snake_case)
-        # We must NOT send keys that don't exist in the table, or Supabase will error.
-        mapping = {
-            "firstName": "first_name",
-            "lastName": "last_name",
-            "gender": "gender",
-            "age": "age",
-            "height": "height",
-            "weight": "weight",
-            "workoutFrequency": "workout_frequency",
-            "experienceLevel": "experience_level",
-            "injury": "injury",
-            "feedbackPreference": "feedback_preference",
-            "onboardingCompleted": "onboarding_completed"
-        }
-        
-        db_update = {}
-        for key, value in profile_update.items():
-            # If key is in our mapping, translate it
-            if key in mapping:
-                db_update[mapping[key]] = value
-            # Handle special case if it comes in as weeklyWorkoutFrequency
-            elif key == "weeklyWorkoutFrequency":
-                db_update["workout_frequency"] = value
-            # If the key is ALREADY snake_case (e.g. from a raw payload), utilize it if it's a valid column
-            # For safety, we only accept keys that match the values in our mapping or are clearly intended
-            elif key in mapping.values():
-                db_update[key] = value
-
-        print(f"Database update payload: {db_update}")
+        db_update = map_profile_update(profile_update)
         
         # Use UPSERT to create the profile if it doesn't exist.
-        # We need to ensure 'id' is in the payload for a valid upsert.
-        db_update['id'] = user_id
+        # Field-by-field PATCHes arriving close together are merged per user
+        # and flushed as one (multi-row) upsert.
+        response_data = await profile_writer.submit(user_id, db_update)
+        profile_cache.invalidate(user_id)
+
+        return response_data
+    except Exception as e:
+        logger.exception("profile update failed", extra={"user_id": user_id, "fields": sorted(profile_update)})
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/profiles/batch")
+async def batch_profiles(batch: ProfileBatchRequest):
+    try:
+        # Writes first so reads in the same call observe them
+        user_ids = list(batch.write)
+        results = await asyncio.gather(*(
+            profile_writer.submit(user_id, map_profile_update(batch.write[user_id])) for user_id in user_ids
+        ))
+        for user_id in user_ids:
+            profile_cache.invalidate(user_id)
+        written = dict(zip(user_ids, results))
+        
+        # Cache misses are loaded with one query, under the same in-flight
+        # and invalidation rules as single profile reads
+        profiles = await profile_cache.get_or_load_many(batch.read, load_user_profiles)
         
-        # Note: If a column doesn't exist, Supabase might error. 
-        # But we have validated our keys against the mapping now.
-        response = supabase.table("profiles").upsert(db_update).execute()
-            
-        print(f"Database response: {response.data}")
-        return response.data
+        return {"profiles": profiles, "written": written}
     except Exception as e:
-        print(f"Error updating/upserting profile: {e}")
+        logger.exception("batch profile request failed", extra={"writes": len(batch.write), "reads": len(batch.read)})
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,62 @@
+import os
+import importlib.util
+from typing import Optional
+import httpx
+
+# Shared outbound HTTP client for upstream AI calls.
+# One pooled client lives for the whole app lifetime so chat requests reuse
+# warm keep-alive connections instead of paying TCP+TLS setup every message.
+
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+
+_client: Optional[httpx.AsyncClient] = None
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+def http2_available() -> bool:
+    # httpx only speaks HTTP/2 when the optional 'h2' package is installed
+    return importlib.util.find_spec("h2") is not None
+
+def build_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=_env_int("OPENAI_MAX_CONNECTIONS", 100),
+        max_keepalive_connections=_env_int("OPENAI_MAX_KEEPALIVE", 20),
+        keepalive_expiry=_env_float("OPENAI_KEEPALIVE_EXPIRY", 60.0),
+    )
+    # Per-phase timeouts: fail fast on connect/pool, give generation time on read
+    timeout = httpx.Timeout(
+        connect=_env_float("OPENAI_CONNECT_TIMEOUT", 5.0),
+        read=_env_float("OPENAI_READ_TIMEOUT", 30.0),
+        write=_env_float("OPENAI_WRITE_TIMEOUT", 10.0),
+        pool=_env_float("OPENAI_POOL_TIMEOUT", 10.0),
+    )
+    use_http2 = os.getenv("OPENAI_HTTP2", "true").lower() in ("1", "true", "yes") and http2_available()
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=use_http2)
+
+async def start_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = build_client()
+    return _client
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def http_client_ready() -> bool:
+    return _client is not None and not _client.is_closed
+
+def get_http_client() -> httpx.AsyncClient:
+    # Normally created in the FastAPI lifespan; built lazily for scripts and tests
+    global _client
+    if _client is None or _client.is_closed:
+        _client = build_client()
+    return _client
@@ -0,0 +1,228 @@
+import re
+import string
+from typing import Dict, List, Optional, Any
+
+# Data-driven intent table for the offline fallback responses.
+# The table is compiled once, at import, into a word-variant lookup, so routing
+# a message is one tokenizing pass plus hashed lookups instead of a substring
+# scan per keyword. Matching is on whole words, so "leg" no longer fires inside
+# other words. When several intents match, the highest priority wins (specific
+# exercises beat generic body parts, which beat small talk); ties go to table
+# order.
+#
+# "keywords" match on their own; each list in "combinations" matches only when
+# all of its words appear somewhere in the message.
+
+INTENTS: List[Dict[str, Any]] = [
+    {
+        "name": "incline_chest_press",
+        "priority": 95,
+        "keywords": ["incline chest press"],
+        "combinations": [["incline", "chest"]],
+        "response": "The Incline Chest Press targets your upper chest, anterior deltoids, and triceps - perfect for building that defined upper chest! Set the bench to a 30-45 degree angle. Keep your feet flat on the floor and maintain a slight arch in your back. Grip the bar at shoulder-width or slightly wider. Lower the bar to your upper chest (just below your collarbone) with control. Press up powerfully, focusing on squeezing your upper pecs at the top. The incline angle shifts emphasis to your upper chest, creating that balanced, developed look. Start with 3 sets of 8-10 reps. Remember, form over weight - control is key! 🔥"
+    },
+    {
+        "name": "chest_press",
+        "priority": 90,
+        "keywords": ["chest press"],
+        "response": "The Chest Press is a fantastic compound exercise for building your pectorals, anterior deltoids, and triceps! Here's how to do it right: Lie flat on the bench with your feet firmly on the floor. Grip the bar slightly wider than shoulder-width. Lower the bar to your chest with control, keeping your elbows at about 45 degrees from your body. Press up explosively but controlled, fully extending your arms without locking your elbows. Aim for 3-4 sets of 8-12 reps. Focus on controlled movement - the negative (lowering) phase is just as important as the positive! 💪"
+    },
+    {
+        "name": "deadlift",
+        "priority": 90,
+        "keywords": ["deadlift", "dead lift"],
+        "response": "The Deadlift is the king of compound exercises - it works your entire posterior chain (hamstrings, glutes, lower back, traps) and builds incredible functional strength! Here's proper form: Stand with feet hip-width apart, bar over mid-foot. Hinge at your hips and bend your knees slightly, keeping your back straight and chest up. Grip the bar just outside your legs (overhand or mixed grip for heavy weights). Drive through your heels, extend your hips and knees simultaneously, keeping the bar close to your body. Stand tall at the top, squeezing your glutes. Lower with control by reversing the movement. Start with 3-5 sets of 5-8 reps. This exercise builds real-world strength and is essential for overall development! 💪"
+    },
+    {
+        "name": "lat_pulldown",
+        "priority": 90,
+        "keywords": ["lat pulldown", "lat pull down", "lat pull-down"],
+        "response": "The Lat Pulldown is excellent for building width in your back, targeting your latissimus dorsi, rhomboids, and biceps! Sit at the machine with your thighs secured under the pads. Grip the bar wider than shoulder-width (palms facing away). Lean back slightly (about 30 degrees) and pull the bar down to your upper chest, not behind your neck. Focus on pulling with your back muscles, not just your arms - imagine squeezing your shoulder blades together. Control the weight on the way up - the negative phase is crucial for muscle growth. Aim for 3-4 sets of 10-12 reps. This exercise is perfect if pull-ups are too challenging - it's a great progression! 🎯"
+    },
+    {
+        "name": "shoulder_press",
+        "priority": 90,
+        "keywords": ["shoulder press"],
+        "combinations": [["shoulder", "press"]],
+        "response": "The Shoulder Press (also called Overhead Press) is a fundamental upper body exercise that builds strong, defined shoulders and triceps! Here's proper technique: Stand or sit with feet shoulder-width apart, core engaged. Hold the bar or dumbbells at shoulder height, palms facing forward, elbows slightly in front of the bar. Press the weight straight up, keeping your core tight and avoiding arching your back excessively. At the top, the weight should be directly over your head, not behind it. Lower with control back to shoulder height. This exercise targets your anterior and medial deltoids, triceps, and core. Start with 3-4 sets of 8-12 reps. For seated variations, use a bench with back support to focus purely on shoulder strength! 🔥"
+    },
+    {
+        "name": "push_up",
+        "priority": 60,
+        "keywords": ["push", "push-up", "pushup"],
+        "response": "Push-ups are fantastic for building upper body strength! Here's the key: keep your body in a straight line from head to heels, lower yourself slowly until your chest nearly touches the floor, then push back up with control. Start with 3 sets of 8-10 reps and gradually increase. Remember, quality over quantity - proper form is everything! 💪"
+    },
+    {
+        "name": "pull_up",
+        "priority": 60,
+        "keywords": ["pull", "pull-up", "pullup", "chin", "chinup"],
+        "response": "Pull-ups are challenging but so rewarding! If you're just starting, use an assisted pull-up machine or resistance bands. Grip the bar slightly wider than shoulder-width, pull yourself up until your chin clears the bar, then lower with control. Even 1-2 reps is progress - keep at it! 🎯"
+    },
+    {
+        "name": "squat",
+        "priority": 60,
+        "keywords": ["squat", "squatting"],
+        "response": "Squats are one of the best exercises for your legs and glutes! Stand with your feet shoulder-width apart, keep your chest up and back straight. Lower down as if you're sitting in a chair, going as low as you can while keeping your knees behind your toes. Aim for 3 sets of 12-15 reps. You've got this! 🔥"
+    },
+    {
+        "name": "plank",
+        "priority": 60,
+        "keywords": ["plank", "core"],
+        "response": "Planks are amazing for core strength! Start in a push-up position, but rest on your forearms. Keep your body in a straight line - no sagging hips or raised butt. Hold for 20-30 seconds to start, and work your way up. Focus on breathing normally and engaging your core. You're building serious strength! 💪"
+    },
+    {
+        "name": "cardio",
+        "priority": 60,
+        "keywords": ["cardio", "running", "treadmill", "jog"],
+        "response": "Cardio is essential for heart health and overall fitness! Start with 20-30 minutes of moderate intensity - you should be able to hold a conversation while doing it. You can run, walk, cycle, or use the elliptical. The best cardio is the one you'll actually do consistently! Even 15-20 minutes a day makes a huge difference. 🏃‍♂️"
+    },
+    {
+        "name": "legs",
+        "priority": 40,
+        "keywords": ["leg"],
+        "response": "Squats are one of the best exercises for your legs and glutes! Stand with your feet shoulder-width apart, keep your chest up and back straight. Lower down as if you're sitting in a chair, going as low as you can while keeping your knees behind your toes. Aim for 3 sets of 12-15 reps. You've got this! 🔥"
+    },
+    {
+        "name": "nutrition",
+        "priority": 50,
+        "keywords": ["protein", "nutrition", "diet", "eat", "food"],
+        "response": "Nutrition is the foundation of fitness! Aim for lean proteins like chicken, fish, eggs, or plant-based options. Fill your plate with colorful vegetables, include whole grains, and don't forget to stay hydrated - drink plenty of water throughout the day. A balanced diet fuels your workouts and helps you recover faster! 🥗"
+    },
+    {
+        "name": "hydration",
+        "priority": 50,
+        "keywords": ["water", "hydrate", "drink"],
+        "response": "Hydration is crucial! Aim for about 8-10 glasses of water per day, more if you're working out. A good rule of thumb: drink water before, during, and after your workouts. If you're feeling thirsty, you're already a bit dehydrated. Keep a water bottle with you and sip throughout the day! 💧"
+    },
+    {
+        "name": "motivation",
+        "priority": 40,
+        "keywords": ["motivation", "motivate", "encourage", "help", "stuck"],
+        "response": "You're doing amazing, and I'm here to support you! Remember why you started - every workout counts, every rep matters. Progress isn't always linear, but consistency is key. You're stronger than you think, and every day you show up is a victory. Keep pushing forward - I believe in you! Let's crush those goals together! 💪✨"
+    },
+    {
+        "name": "fatigue",
+        "priority": 45,
+        "keywords": ["tired", "exhausted", "can't"],
+        "response": "I totally get it - some days are harder than others. Listen to your body - if you're truly exhausted, rest is important too. But if it's just mental fatigue, sometimes a light workout or even a 10-minute walk can boost your energy. Remember, showing up is half the battle. You've got this! 🌟"
+    },
+    {
+        "name": "workout_plan",
+        "priority": 30,
+        "keywords": ["routine", "plan", "schedule", "workout"],
+        "response": "Great question! A good workout routine balances strength training, cardio, and rest. Try 3-4 days of strength training per week, 2-3 days of cardio, and at least 1-2 rest days. Focus on compound movements like squats, deadlifts, and push-ups. Start with what you can do consistently - even 20-30 minutes is better than nothing! 🎯"
+    },
+    {
+        "name": "weight",
+        "priority": 30,
+        "keywords": ["weight", "lose", "gain", "fat"],
+        "response": "Weight management is about balance! For weight loss, you need a calorie deficit - but don't go too extreme. Combine strength training with cardio, eat nutrient-dense foods, and be patient. For weight gain, focus on strength training and eat slightly above maintenance. Remember, sustainable changes beat quick fixes every time! 💪"
+    },
+    {
+        "name": "greeting",
+        "priority": 20,
+        "keywords": ["hello", "hi", "hey", "start", "begin"],
+        "response": "Hey there! I'm Gimmify, your AI fitness coach, and I'm excited to help you on your fitness journey! I can help with exercise techniques, workout plans, nutrition advice, and motivation. What would you like to know about today? Let's get started! 🎯"
+    },
+    {
+        "name": "thanks",
+        "priority": 20,
+        "keywords": ["thank", "thanks"],
+        "response": "You're so welcome! I'm always here to help you on your fitness journey. Keep up the amazing work - you're making great progress! Remember, every step forward counts. If you have any more questions, just ask! 💪"
+    },
+    {
+        "name": "goodbye",
+        "priority": 20,
+        "keywords": ["goodbye", "bye", "see you", "quit", "quitting"],
+        "response": "It was great chatting with you! Keep up the fantastic work on your fitness journey. Remember, consistency is key - you've got this! Come back anytime if you need motivation or have questions. Stay strong! 💪✨"
+    }
+]
+
+DEFAULT_RESPONSE = "That's a great question! For the best personalized advice, I'd recommend combining what you learn here with consulting a fitness professional. But remember - consistency, proper form, and listening to your body are the foundations of any fitness journey. Keep pushing forward, stay patient, and celebrate your progress along the way! You're doing great! 🌟"
+
+# Plural/verb endings so "squats", "legs" and "eating" still hit their keyword
+_SUFFIXES = ("", "s", "es", "ing", "ed")
+# Short consonant-vowel-consonant words double their last letter: jog -> jogging
+_DOUBLES = re.compile(r"(?:^|[^aeiou])[aeiou][bdgklmnprt]$")
+# Punctuation (except in-word ' and -) becomes whitespace, then str.split tokenizes
+_PUNCTUATION = str.maketrans({c: " " for c in string.punctuation if c not in "'-"})
+
+def _tokenize(message: str) -> List[str]:
+    # Hyphenated words count as themselves, their parts and the closed
+    # compound: "chin-ups" -> chin-ups, chin, ups, chinups
+    words = message.lower().translate(_PUNCTUATION).split()
+    if "-" not in message:
+        return words
+    tokens = []
+    for word in words:
+        if "-" in word:
+            tokens.extend(part for part in word.split("-") if part)
+            tokens.append(word.replace("-", ""))
+        tokens.append(word)
+    return tokens
+
+def _compile(intents: List[Dict[str, Any]]):
+    # word variant -> keyword, for single-word keywords and combination words
+    words: Dict[str, str] = {}
+    # first word -> [(multi-word keyword, regex confirming word order)]
+    phrases: Dict[str, List[Any]] = {}
+    # keyword -> best (priority, table position) of the intents it triggers directly
+    keyword_rank: Dict[str, Any] = {}
+    combinations: List[Any] = []
+
+    def add_term(term: str) -> None:
+        parts = term.split()
+        if len(parts) == 1:
+            for suffix in _SUFFIXES:
+                words.setdefault(term + suffix, term)
+            if term.endswith("e"):
+                words.setdefault(term + "d", term)
+            if _DOUBLES.search(term):
+                for suffix in ("ing", "ed"):
+                    words.setdefault(term + term[-1] + suffix, term)
+        else:
+            pattern = re.compile(rf"\b{re.escape(term)}(?:{'|'.join(_SUFFIXES[1:])})?\b")
+            phrases.setdefault(parts[0], []).append((term, pattern))
+
+    for position, intent in enumerate(intents):
+        rank = (intent["priority"], -position)
+        for term in intent.get("keywords", []):
+            add_term(term)
+            if term not in keyword_rank or rank > keyword_rank[term][0]:
+                keyword_rank[term] = (rank, intent)
+        for combo in intent.get("combinations", []):
+            for term in combo:
+                add_term(term)
+            combinations.append((rank, frozenset(combo), intent))
+    return words, phrases, keyword_rank, combinations
+
+_WORDS, _PHRASES, _KEYWORD_RANK, _COMBINATIONS = _compile(INTENTS)
+_WORD_KEYS = frozenset(_WORDS)
+_PHRASE_STARTS = frozenset(_PHRASES)
+
+def match_intent(message: str) -> Optional[Dict[str, Any]]:
+    # One tokenizing pass; keyword lookup is a C-level set intersection
+    tokens = _tokenize(message)
+    found = {_WORDS[t] for t in _WORD_KEYS.intersection(tokens)}
+
+    starts = _PHRASE_STARTS.intersection(tokens)
+    if starts:
+        # Phrases are matched with hyphens read as spaces ("lat pull-down")
+        joined = message.lower().translate(_PUNCTUATION).replace("-", " ")
+        joined = " ".join(joined.split())
+        for start in starts:
+            for phrase, pattern in _PHRASES[start]:
+                if pattern.search(joined):
+                    found.add(phrase)
+    if not found:
+        return None
+
+    best = None
+    for term in found:
+        entry = _KEYWORD_RANK.get(term)
+        if entry and (best is None or entry[0] > best[0]):
+            best = entry
+    for rank, combo, intent in _COMBINATIONS:
+        if (best is None or rank > best[0]) and combo <= found:
+            best = (rank, intent)
+    return best[1] if best else None
@@ -0,0 +1,229 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+# Model routing for upstream AI calls.
+# Each model has a circuit breaker so a model that is clearly down stops
+# receiving traffic, and requests are hedged: if the preferred model has not
+# answered within its observed p95 latency, the next healthy model is raced
+# against it and whichever answers first wins (the loser is cancelled).
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+
+    def allow_request(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            # Cool-down elapsed: let exactly one probe through
+            self.state = HALF_OPEN
+        if self.probe_in_flight:
+            return False
+        self.probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self.probe_in_flight = False
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        # A cancelled attempt tells us nothing about the model's health
+        self.probe_in_flight = False
+
+class ModelStats:
+    def __init__(self, name: str, breaker: CircuitBreaker):
+        self.name = name
+        self.breaker = breaker
+        self.latencies: deque = deque(maxlen=200)
+        self.successes = 0
+        self.failures = 0
+        self.cancelled = 0
+
+    def p95(self) -> Optional[float]:
+        if len(self.latencies) < 5:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        p95 = self.p95()
+        return {
+            "state": self.breaker.state,
+            "successes": self.successes,
+            "failures": self.failures,
+            "cancelled": self.cancelled,
+            "p95Ms": round(p95 * 1000, 1) if p95 is not None else None
+        }
+
+class ModelRouter:
+    def __init__(
+        self,
+        models: List[str],
+        hedge_delay: Optional[float] = None,
+        min_hedge_delay: float = 0.25,
+        default_hedge_delay: float = 2.0,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0
+    ):
+        self.models = {
+            name: ModelStats(name, CircuitBreaker(failure_threshold, reset_timeout)) for name in models
+        }
+        self.order = list(models)
+        self.hedge_delay = hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.default_hedge_delay = default_hedge_delay
+        self.decisions: Dict[str, int] = {"primary": 0, "hedge": 0, "failover": 0, "exhausted": 0}
+        self.last_decision: Optional[Dict[str, Any]] = None
+
+    def available_models(self) -> List[str]:
+        # Preference order, skipping models whose breaker is open (no probe slot taken)
+        available = []
+        for name in self.order:
+            breaker = self.models[name].breaker
+            if breaker.state == CLOSED:
+                available.append(name)
+            elif breaker.state == OPEN and time.monotonic() - breaker.opened_at >= breaker.reset_timeout:
+                available.append(name)
+            elif breaker.state == HALF_OPEN and not breaker.probe_in_flight:
+                available.append(name)
+        return available
+
+    def hedge_delay_for(self, model: str) -> float:
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        p95 = self.models[model].p95()
+        return max(self.min_hedge_delay, p95) if p95 is not None else self.default_hedge_delay
+
+    def acquire(self, model: str) -> bool:
+        return self.models[model].breaker.allow_request()
+
+    def record_success(self, model: str, latency: Optional[float] = None) -> None:
+        stats = self.models[model]
+        stats.breaker.record_success()
+        stats.successes += 1
+        # Only full-completion latencies feed the hedge delay
+        if latency is not None:
+            stats.latencies.append(latency)
+
+    def record_failure(self, model: str) -> None:
+        stats = self.models[model]
+        stats.breaker.record_failure()
+        stats.failures += 1
+
+    def record_cancelled(self, model: str) -> None:
+        stats = self.models[model]
+        stats.breaker.release()
+        stats.cancelled += 1
+
+    async def _attempt(self, model: str, call: Callable[[str], Awaitable[Optional[str]]]) -> Optional[str]:
+        started = time.monotonic()
+        try:
+            result = await call(model)
+        except asyncio.CancelledError:
+            self.record_cancelled(model)
+            raise
+        except Exception as e:
+            logger.warning("model call failed", extra={"model": model, "error": str(e)})
+            self.record_failure(model)
+            return None
+        if result:
+            self.record_success(model, time.monotonic() - started)
+        else:
+            self.record_failure(model)
+        return result
+
+    async def route(self, call: Callable[[str], Awaitable[Optional[str]]]) -> Optional[str]:
+        pending_models = list(self.order)
+        running: Dict[asyncio.Task, str] = {}
+        winner: Optional[str] = None
+        result: Optional[str] = None
+        hedged = False
+        failed_over = False
+
+        def launch_next() -> bool:
+            while pending_models:
+                name = pending_models.pop(0)
+                if self.acquire(name):
+                    running[asyncio.ensure_future(self._attempt(name, call))] = name
+                    return True
+            return False
+
+        try:
+            launch_next()
+            while running:
+                primary = next(iter(running.values()))
+                # Only one hedge in flight at a time: wait for the hedge delay
+                # while a single attempt runs, otherwise wait for any finisher
+                timeout = self.hedge_delay_for(primary) if len(running) == 1 and pending_models else None
+                done, _ = await asyncio.wait(running.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    if launch_next():
+                        hedged = True
+                    continue
+
+                for task in done:
+                    name = running.pop(task)
+                    if result is None and task.result():
+                        result = task.result()
+                        winner = name
+
+                if result is not None:
+                    break
+                # An attempt failed: replace it right away instead of waiting
+                if launch_next():
+                    failed_over = True
+        finally:
+            # Cancel the losing request(s) so their connections are released
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running.keys(), return_exceptions=True)
+
+        decision = "exhausted" if result is None else "hedge" if hedged else "failover" if failed_over else "primary"
+        self.decisions[decision] += 1
+        self.last_decision = {"decision": decision, "model": winner, "at": time.time()}
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "models": {name: stats.snapshot() for name, stats in self.models.items()},
+            "decisions": dict(self.decisions),
+            "lastDecision": self.last_decision
+        }
+
+def router_from_env(models: List[str]) -> ModelRouter:
+    hedge_ms = os.getenv("OPENAI_HEDGE_DELAY_MS")
+    return ModelRouter(
+        models,
+        hedge_delay=float(hedge_ms) / 1000 if hedge_ms else None,
+        min_hedge_delay=float(os.getenv("OPENAI_HEDGE_MIN_MS", "250")) / 1000,
+        default_hedge_delay=float(os.getenv("OPENAI_HEDGE_DEFAULT_MS", "2000")) / 1000,
+        failure_threshold=int(os.getenv("OPENAI_BREAKER_FAILURES", "3")),
+        reset_timeout=float(os.getenv("OPENAI_BREAKER_RESET_SECONDS", "30"))
+    )
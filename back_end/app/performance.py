@@ -0,0 +1,76 @@
+import math
+import time
+import uuid
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, field_validator
+from app.workout_store import workout_store, MAX_WEIGHT_KG, MAX_RANGE_OF_MOTION
+
+# Workout logging and the rollups behind the performance page. Reads only
+# touch pre-aggregated rows (see app/workout_store.py).
+
+router = APIRouter()
+
+ROLLUP_LIMITS = {"monthly": ("month", 12), "weekly": ("week", 12), "daily": ("day", 30)}
+
+# Clock skew allowed on client timestamps
+MAX_FUTURE_SECONDS = 86400
+
+def check_timestamp(value: Optional[float]) -> Optional[float]:
+    # Epoch seconds from 1970 up to a day ahead; anything else cannot be
+    # bucketed by date (and 1e15 would overflow it)
+    if value is not None and not 0 <= value <= time.time() + MAX_FUTURE_SECONDS:
+        raise ValueError("must be epoch seconds between 1970 and now")
+    return value
+
+def check_bounded(limit: float):
+    # inf, NaN or huge values would poison the rollup sums for good: the
+    # performance endpoint cannot serialize an infinite volume
+    def check(value: Optional[float]) -> Optional[float]:
+        if value is not None and not (math.isfinite(value) and 0 <= value <= limit):
+            raise ValueError(f"must be a number between 0 and {limit:g}")
+        return value
+    return check
+
+class RepEntry(BaseModel):
+    timestamp: Optional[float] = None
+    weight: float = 0.0
+    rangeOfMotion: Optional[float] = None
+
+    _check_timestamp = field_validator("timestamp")(check_timestamp)
+    _check_weight = field_validator("weight")(check_bounded(MAX_WEIGHT_KG))
+    _check_range_of_motion = field_validator("rangeOfMotion")(check_bounded(MAX_RANGE_OF_MOTION))
+
+class WorkoutSession(BaseModel):
+    sessionId: Optional[str] = None
+    exercise: str
+    startedAt: Optional[float] = None
+    reps: List[RepEntry]
+
+    _check_started_at = field_validator("startedAt")(check_timestamp)
+
+@router.get("/performance/{user_id}")
+async def get_performance(user_id: str):
+    result = {"userId": user_id}
+    for key, (period, limit) in ROLLUP_LIMITS.items():
+        result[key] = workout_store.rollups(user_id, period, limit)
+    # Short month names, as the performance chart labels its bars
+    for row in result["monthly"]:
+        row["month"] = datetime.strptime(row["period"], "%Y-%m").strftime("%b")
+    return result
+
+@router.post("/performance/{user_id}/sessions")
+async def record_workout(user_id: str, session: WorkoutSession):
+    if not session.reps:
+        raise HTTPException(status_code=422, detail="A workout session needs at least one rep")
+    started_at = session.startedAt if session.startedAt is not None else time.time()
+    session_id = session.sessionId or uuid.uuid4().hex
+    recorded = workout_store.record_session(
+        user_id,
+        session_id,
+        session.exercise,
+        started_at,
+        [(rep.timestamp if rep.timestamp is not None else started_at, rep.weight, rep.rangeOfMotion) for rep in session.reps]
+    )
+    return {"sessionId": session_id, **recorded}
@@ -0,0 +1,211 @@
+import asyncio
+from typing import Dict, List, Optional, Any
+import numpy as np
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+
+# Exercise analytics over MediaPipe Pose landmark streams.
+# Frames arrive as an (N, 33, 4) array of [x, y, z, visibility]. Every joint
+# angle for every frame is computed in one vectorized pass, and rep counting /
+# phase detection run as array operations over the whole batch.
+
+router = APIRouter()
+
+LANDMARK_COUNT = 33
+LANDMARK_FIELDS = 4
+
+# MediaPipe Pose landmark indices
+LEFT_SHOULDER, RIGHT_SHOULDER = 11, 12
+LEFT_ELBOW, RIGHT_ELBOW = 13, 14
+LEFT_WRIST, RIGHT_WRIST = 15, 16
+LEFT_HIP, RIGHT_HIP = 23, 24
+LEFT_KNEE, RIGHT_KNEE = 25, 26
+LEFT_ANKLE, RIGHT_ANKLE = 27, 28
+
+# Joint angle = angle at the middle landmark of each triplet
+JOINTS = {
+    "left_elbow": (LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST),
+    "right_elbow": (RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST),
+    "left_shoulder": (LEFT_HIP, LEFT_SHOULDER, LEFT_ELBOW),
+    "right_shoulder": (RIGHT_HIP, RIGHT_SHOULDER, RIGHT_ELBOW),
+    "left_hip": (LEFT_SHOULDER, LEFT_HIP, LEFT_KNEE),
+    "right_hip": (RIGHT_SHOULDER, RIGHT_HIP, RIGHT_KNEE),
+    "left_knee": (LEFT_HIP, LEFT_KNEE, LEFT_ANKLE),
+    "right_knee": (RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE),
+}
+JOINT_NAMES = list(JOINTS)
+_TRIPLETS = np.array([JOINTS[name] for name in JOINT_NAMES], dtype=np.intp)
+
+# A rep is a move from the flexed zone (angle below `flexed`) to the extended
+# zone (angle above `extended`). The gap between the two thresholds is the
+# hysteresis band, so jitter around one threshold cannot count extra reps.
+# `concentric` is the direction the tracked angle moves while lifting.
+EXERCISES = {
+    "chest_press": {"joints": ["left_elbow", "right_elbow"], "flexed": 90.0, "extended": 150.0, "concentric": "increasing"},
+    "incline_chest_press": {"joints": ["left_elbow", "right_elbow"], "flexed": 90.0, "extended": 150.0, "concentric": "increasing"},
+    "shoulder_press": {"joints": ["left_elbow", "right_elbow"], "flexed": 90.0, "extended": 155.0, "concentric": "increasing"},
+    "lat_pulldown": {"joints": ["left_elbow", "right_elbow"], "flexed": 80.0, "extended": 150.0, "concentric": "decreasing"},
+    "deadlift": {"joints": ["left_hip", "right_hip"], "flexed": 110.0, "extended": 160.0, "concentric": "increasing"},
+    "squat": {"joints": ["left_knee", "right_knee"], "flexed": 100.0, "extended": 160.0, "concentric": "increasing"},
+}
+
+CONCENTRIC, HOLD, ECCENTRIC = 1, 0, -1
+
+def as_frames(frames: Any) -> np.ndarray:
+    array = np.asarray(frames, dtype=np.float32)
+    if array.ndim == 2:
+        array = array[np.newaxis]
+    if array.ndim != 3 or array.shape[1] != LANDMARK_COUNT or array.shape[2] < 3:
+        raise ValueError(f"frames must have shape (N, {LANDMARK_COUNT}, 4), got {array.shape}")
+    if array.shape[2] == 3:
+        # No visibility channel: treat every landmark as visible
+        array = np.concatenate([array, np.ones(array.shape[:2] + (1,), dtype=np.float32)], axis=2)
+    return array
+
+def compute_joint_angles(frames: np.ndarray, min_visibility: float = 0.5) -> np.ndarray:
+    # (N, 33, 4) -> (N, len(JOINTS)) degrees in [0, 180]; NaN where any of the
+    # three landmarks is below the visibility threshold
+    points = frames[:, _TRIPLETS, :2]            # (N, J, 3, 2)
+    ba = points[:, :, 0] - points[:, :, 1]
+    bc = points[:, :, 2] - points[:, :, 1]
+    dot = np.einsum("njk,njk->nj", ba, bc)
+    cross = ba[..., 0] * bc[..., 1] - ba[..., 1] * bc[..., 0]
+    angles = np.degrees(np.abs(np.arctan2(cross, dot))).astype(np.float32)
+
+    visibility = frames[:, _TRIPLETS, 3].min(axis=2)
+    angles[visibility < min_visibility] = np.nan
+    return angles
+
+def fill_gaps(signal: np.ndarray) -> np.ndarray:
+    # Linear interpolation over masked (NaN) frames
+    valid = ~np.isnan(signal)
+    if valid.all() or not valid.any():
+        return signal
+    index = np.arange(signal.size)
+    return np.interp(index, index[valid], signal[valid]).astype(signal.dtype)
+
+def smooth(signal: np.ndarray, window: int) -> np.ndarray:
+    if window <= 1 or signal.size < window:
+        return signal
+    kernel = np.ones(window, dtype=np.float32) / window
+    padded = np.pad(signal, (window // 2, window - 1 - window // 2), mode="edge")
+    return np.convolve(padded, kernel, mode="valid")
+
+def zone_states(signal: np.ndarray, flexed: float, extended: float, initial: int = 0) -> np.ndarray:
+    # -1 in the flexed zone, +1 in the extended zone; frames inside the
+    # hysteresis band (or masked) keep the last zone seen - a vectorized
+    # forward fill instead of a per-frame state machine
+    raw = np.zeros(signal.size, dtype=np.int8)
+    raw[signal < flexed] = -1
+    raw[signal > extended] = 1
+    raw = np.concatenate([np.array([initial], dtype=np.int8), raw])
+    last_set = np.where(raw != 0, np.arange(raw.size), 0)
+    np.maximum.accumulate(last_set, out=last_set)
+    return raw[last_set]
+
+def detect_phases(signal: np.ndarray, concentric: str, deadband: float = 0.5) -> np.ndarray:
+    velocity = np.gradient(signal) if signal.size > 1 else np.zeros_like(signal)
+    if concentric == "decreasing":
+        velocity = -velocity
+    phases = np.full(signal.size, HOLD, dtype=np.int8)
+    phases[velocity > deadband] = CONCENTRIC
+    phases[velocity < -deadband] = ECCENTRIC
+    phases[np.isnan(velocity)] = HOLD
+    return phases
+
+def tracked_signal(angles: np.ndarray, config: Dict[str, Any]) -> np.ndarray:
+    # Average the left/right sides that are visible; frames with neither are masked
+    tracked = angles[:, [JOINT_NAMES.index(name) for name in config["joints"]]]
+    counts = (~np.isnan(tracked)).sum(axis=1)
+    return np.where(counts > 0, np.nansum(tracked, axis=1) / np.maximum(counts, 1), np.nan).astype(np.float32)
+
+def analyze_exercise(
+    frames: Any,
+    exercise: str,
+    min_visibility: float = 0.5,
+    smoothing: int = 5,
+    angles: Optional[np.ndarray] = None
+) -> Dict[str, Any]:
+    if exercise not in EXERCISES:
+        raise ValueError(f"Unknown exercise '{exercise}'. Supported: {', '.join(EXERCISES)}")
+    config = EXERCISES[exercise]
+
+    if angles is None:
+        angles = compute_joint_angles(as_frames(frames), min_visibility)
+    signal = tracked_signal(angles, config)
+    masked = np.isnan(signal)
+
+    filled = smooth(fill_gaps(signal), smoothing)
+    # Never let interpolation alone move a rep across a zone boundary
+    gated = np.where(masked, (config["flexed"] + config["extended"]) / 2, filled)
+    states = zone_states(gated, config["flexed"], config["extended"])
+    rep_ends = np.flatnonzero((states[:-1] == -1) & (states[1:] == 1))
+
+    phases = detect_phases(filled, config["concentric"])
+    phases[masked] = HOLD
+
+    # Range of motion per rep: span of the tracked angle since the previous rep ended
+    bounds = np.concatenate([[0], rep_ends + 1])
+    if rep_ends.size and not np.isnan(filled).all():
+        segment_max = np.maximum.reduceat(filled, bounds[:-1])
+        segment_min = np.minimum.reduceat(filled, bounds[:-1])
+        rom = segment_max - segment_min
+    else:
+        rom = np.empty(0, dtype=np.float32)
+
+    return {
+        "exercise": exercise,
+        "frames": int(signal.size),
+        "reps": int(rep_ends.size),
+        "repEndFrames": rep_ends,
+        "rangeOfMotion": rom,
+        "phases": phases,
+        "signal": filled,
+        "angles": angles,
+        "visibleRatio": float(1 - masked.mean()) if signal.size else 0.0
+    }
+
+# Ten minutes at 30 fps. Longer recordings go over /ws/pose in chunks
+MAX_BATCH_FRAMES = 18000
+
+class PoseBatch(BaseModel):
+    exercise: str
+    frames: List[List[List[float]]] = Field(max_length=MAX_BATCH_FRAMES)
+    minVisibility: float = 0.5
+    includeSeries: bool = False
+
+def summarize_pose_batch(batch: PoseBatch) -> Dict[str, Any]:
+    result = analyze_exercise(batch.frames, batch.exercise, batch.minVisibility)
+    phases = result["phases"]
+    response = {
+        "exercise": result["exercise"],
+        "frames": result["frames"],
+        "reps": result["reps"],
+        "repEndFrames": result["repEndFrames"].tolist(),
+        "rangeOfMotion": [round(float(v), 1) for v in result["rangeOfMotion"]],
+        "visibleRatio": round(result["visibleRatio"], 3),
+        "phaseFrames": {
+            "concentric": int((phases == CONCENTRIC).sum()),
+            "eccentric": int((phases == ECCENTRIC).sum()),
+            "hold": int((phases == HOLD).sum())
+        },
+        "meanAngles": {
+            name: (None if np.isnan(column).all() else round(float(np.nanmean(column)), 1))
+            for name, column in zip(JOINT_NAMES, result["angles"].T)
+        }
+    }
+    if batch.includeSeries:
+        response["angles"] = {
+            name: [None if np.isnan(v) else round(float(v), 1) for v in column]
+            for name, column in zip(JOINT_NAMES, result["angles"].T)
+        }
+        response["phases"] = phases.tolist()
+    return response
+
+@router.post("/pose/analyze")
+async def analyze_pose_batch(batch: PoseBatch):
+    # Seconds of NumPy work for a long batch; in a thread, other requests keep being served
+    try:
+        return await asyncio.to_thread(summarize_pose_batch, batch)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
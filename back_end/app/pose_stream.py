@@ -0,0 +1,317 @@
+import os
+import json
+import time
+import struct
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from fastapi import WebSocket, WebSocketDisconnect
+from app.pose_analytics import (
+    EXERCISES, JOINT_NAMES, LANDMARK_COUNT, LANDMARK_FIELDS,
+    compute_joint_angles, tracked_signal, zone_states
+)
+
+# Live pose analytics over a WebSocket.
+# Clients send binary messages: a 12-byte header followed by packed
+# little-endian float32 landmarks, frames x 33 x [x, y, z, visibility]. That is
+# ~540 bytes per frame instead of several KB of JSON, and the payload is
+# viewed in place with np.frombuffer rather than parsed.
+# Each connection keeps incremental state (smoothing tail, rep zone, per-rep
+# accumulators) so a new chunk only costs its own frames, never a recompute
+# of the whole session.
+
+# magic, version, fields per landmark, landmarks per frame, frame count, sequence
+HEADER = struct.Struct("<2sBBHHI")
+MAGIC = b"GP"
+VERSION = 1
+# Upper bound on the client's declared frame rate; rep durations divide by it
+MAX_FPS = 240.0
+
+def encode_frames(frames: np.ndarray, sequence: int = 0) -> bytes:
+    payload = np.ascontiguousarray(frames, dtype="<f4")
+    count, landmarks, fields = payload.shape
+    return HEADER.pack(MAGIC, VERSION, fields, landmarks, count, sequence) + payload.tobytes()
+
+def decode_frames(data: bytes, max_frames: int = 300) -> Tuple[int, np.ndarray]:
+    if len(data) < HEADER.size:
+        raise ValueError("message shorter than header")
+    magic, version, fields, landmarks, count, sequence = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("unknown message format")
+    if landmarks != LANDMARK_COUNT or fields != LANDMARK_FIELDS:
+        raise ValueError(f"expected {LANDMARK_COUNT}x{LANDMARK_FIELDS} landmarks, got {landmarks}x{fields}")
+    if count > max_frames:
+        raise ValueError(f"at most {max_frames} frames per message")
+    expected = HEADER.size + count * landmarks * fields * 4
+    if len(data) != expected:
+        raise ValueError(f"expected {expected} bytes, got {len(data)}")
+    # Zero-copy view over the received bytes (read-only)
+    frames = np.frombuffer(data, dtype="<f4", offset=HEADER.size).reshape(count, landmarks, fields)
+    return sequence, frames
+
+class PoseStream:
+    def __init__(self, exercise: str, fps: float = 30.0, min_visibility: float = 0.5, smoothing: int = 5):
+        if exercise not in EXERCISES:
+            raise ValueError(f"Unknown exercise '{exercise}'. Supported: {', '.join(EXERCISES)}")
+        if not 0 < fps <= MAX_FPS:
+            raise ValueError(f"fps must be in (0, {MAX_FPS:g}]")
+        self.exercise = exercise
+        self.config = EXERCISES[exercise]
+        self.columns = [JOINT_NAMES.index(name) for name in self.config["joints"]]
+        self.fps = fps
+        self.min_visibility = min_visibility
+        self.smoothing = smoothing
+
+        self.tail = np.empty(0, dtype=np.float32)    # last smoothing-1 filled samples
+        self.last_valid = np.nan                      # carried across chunks for gap filling
+        self.last_smoothed = np.nan
+        self.state = 0
+        self.reps = 0
+        self.in_frame = True
+        # Rolling one-second window of per-frame visibility
+        self.visibility_window = np.ones(max(int(fps), 1), dtype=bool)
+        # Accumulators for the rep in progress
+        self.rep_min = np.inf
+        self.rep_max = -np.inf
+        self.rep_frames = 0
+        self.rep_concentric = 0
+        self.rep_eccentric = 0
+        self.rep_asymmetry = 0.0
+        self.rep_asymmetry_frames = 0
+
+        self.started_at = time.time()
+        # (wall-clock time, range of motion) per completed rep, for the workout log
+        self.rep_log: List[Tuple[float, float]] = []
+        self.frames = 0
+        self.visible_frames = 0
+        self.rom_total = 0.0
+        self.cpu_seconds = 0.0
+
+    def _fill(self, signal: np.ndarray) -> np.ndarray:
+        # Streaming gap fill: hold the last visible value (no lookahead available)
+        values = np.concatenate([[self.last_valid], signal]).astype(np.float32)
+        valid = ~np.isnan(values)
+        last_set = np.where(valid, np.arange(values.size), 0)
+        np.maximum.accumulate(last_set, out=last_set)
+        filled = values[last_set][1:]
+        if valid[1:].any():
+            self.last_valid = float(signal[valid[1:]][-1])
+        return filled
+
+    def _smooth(self, filled: np.ndarray) -> np.ndarray:
+        # Trailing moving average whose window continues across chunks
+        window = self.smoothing
+        if window <= 1:
+            return filled
+        history = self.tail if self.tail.size else np.repeat(filled[:1], window - 1)
+        padded = np.concatenate([history, filled])
+        self.tail = padded[-(window - 1):]
+        return np.convolve(padded, np.ones(window, dtype=np.float32) / window, mode="valid")
+
+    def process(self, frames: np.ndarray) -> List[Dict[str, Any]]:
+        started = time.thread_time()
+        events: List[Dict[str, Any]] = []
+        count = frames.shape[0]
+        if count == 0:
+            return events
+
+        angles = compute_joint_angles(frames, self.min_visibility)
+        signal = tracked_signal(angles, self.config)
+        masked = np.isnan(signal)
+        smoothed = self._smooth(self._fill(signal))
+
+        # Rep boundaries, continuing from the zone the previous chunk ended in
+        midpoint = (self.config["flexed"] + self.config["extended"]) / 2
+        gated = np.where(masked | np.isnan(smoothed), midpoint, smoothed)
+        states = zone_states(gated, self.config["flexed"], self.config["extended"], initial=self.state)
+        self.state = int(states[-1])
+        rep_ends = np.flatnonzero((states[:-1] == -1) & (states[1:] == 1))
+
+        velocity = np.diff(np.concatenate([[self.last_smoothed], smoothed]))
+        self.last_smoothed = float(smoothed[-1])
+        if self.config["concentric"] == "decreasing":
+            velocity = -velocity
+        concentric = (velocity > 0.5) & ~masked
+        eccentric = (velocity < -0.5) & ~masked
+
+        sides = angles[:, self.columns]
+        both = ~np.isnan(sides).any(axis=1)
+        asymmetry = np.where(both, np.abs(sides[:, 0] - sides[:, -1]), 0.0)
+
+        start = 0
+        for end, completes_rep in [(int(e) + 1, True) for e in rep_ends] + [(count, False)]:
+            segment = slice(start, end)
+            values = smoothed[segment][~masked[segment]]
+            if values.size:
+                self.rep_min = min(self.rep_min, float(values.min()))
+                self.rep_max = max(self.rep_max, float(values.max()))
+            self.rep_frames += end - start
+            self.rep_concentric += int(concentric[segment].sum())
+            self.rep_eccentric += int(eccentric[segment].sum())
+            self.rep_asymmetry += float(asymmetry[segment].sum())
+            self.rep_asymmetry_frames += int(both[segment].sum())
+            if completes_rep:
+                events.append(self._complete_rep())
+            start = end
+
+        visible = int((~masked).sum())
+        self.frames += count
+        self.visible_frames += visible
+        window = self.visibility_window.size
+        self.visibility_window = np.concatenate([self.visibility_window, ~masked])[-window:]
+        ratio = self.visibility_window.mean()
+        # Separate leave/return thresholds so a flickering landmark cannot spam the client
+        if self.in_frame and ratio < 0.5:
+            self.in_frame = False
+            events.append({"type": "feedback", "message": "Step back so your whole body is in frame"})
+        elif not self.in_frame and ratio > 0.8:
+            self.in_frame = True
+
+        self.cpu_seconds += time.thread_time() - started
+        return events
+
+    def _complete_rep(self) -> Dict[str, Any]:
+        self.reps += 1
+        rom = self.rep_max - self.rep_min if self.rep_max >= self.rep_min else 0.0
+        self.rom_total += rom
+        self.rep_log.append((time.time(), float(rom)))
+        duration = self.rep_frames / self.fps
+        asymmetry = self.rep_asymmetry / self.rep_asymmetry_frames if self.rep_asymmetry_frames else 0.0
+
+        feedback = []
+        if duration < 1.0:
+            feedback.append("Slow down and control the weight")
+        if self.rep_eccentric < self.rep_concentric:
+            feedback.append("Slow down the eccentric (return) phase")
+        if asymmetry > 15:
+            feedback.append("Keep both sides moving evenly")
+        if not feedback:
+            feedback.append("Good rep")
+
+        event = {
+            "type": "rep",
+            "reps": self.reps,
+            "rangeOfMotion": round(float(rom), 1),
+            "durationSeconds": round(float(duration), 2),
+            "asymmetry": round(asymmetry, 1),
+            "feedback": feedback
+        }
+        self.rep_min, self.rep_max = np.inf, -np.inf
+        self.rep_frames = self.rep_concentric = self.rep_eccentric = self.rep_asymmetry_frames = 0
+        self.rep_asymmetry = 0.0
+        return event
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "type": "summary",
+            "exercise": self.exercise,
+            "reps": self.reps,
+            "frames": self.frames,
+            "visibleRatio": round(self.visible_frames / self.frames, 3) if self.frames else 0.0,
+            "averageRangeOfMotion": round(self.rom_total / self.reps, 1) if self.reps else 0.0,
+            "cpuMs": round(self.cpu_seconds * 1000, 3)
+        }
+
+class PoseStreamStats:
+    def __init__(self):
+        self.active = 0
+        self.sessions = 0
+        self.frames = 0
+        self.cpu_seconds = 0.0
+        self.backpressure_events = 0
+        self.rejected_messages = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "sessions": self.sessions,
+            "frames": self.frames,
+            "cpuMs": round(self.cpu_seconds * 1000, 1),
+            "processCpuSeconds": round(time.process_time(), 3),
+            "backpressureEvents": self.backpressure_events,
+            "rejectedMessages": self.rejected_messages
+        }
+
+pose_stream_stats = PoseStreamStats()
+
+MAX_PENDING = int(os.getenv("POSE_WS_MAX_PENDING", "32"))
+MAX_FRAMES_PER_MESSAGE = int(os.getenv("POSE_WS_MAX_FRAMES_PER_MESSAGE", "300"))
+
+async def serve_pose_socket(websocket: WebSocket, stream: PoseStream) -> None:
+    # The receiver only decodes and enqueues; the processor drains everything
+    # queued and analyzes it as one batch, so a backlog makes each pass cheaper.
+    # When the bounded queue fills up the client gets a "backpressure" message
+    # and should pause until "resume" (sent once the queue is half drained).
+    # A client that keeps sending anyway is simply not read from, so the TCP
+    # window closes on it instead of frames piling up in memory.
+    # Feedback is sent from the processor, so a client that stops reading
+    # feedback stalls its own processing rather than growing a buffer.
+    queue: "asyncio.Queue[Optional[np.ndarray]]" = asyncio.Queue(maxsize=MAX_PENDING)
+    throttled = False
+    pose_stream_stats.active += 1
+    pose_stream_stats.sessions += 1
+
+    async def receive() -> None:
+        nonlocal throttled
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes") is not None:
+                    try:
+                        _, frames = decode_frames(message["bytes"], MAX_FRAMES_PER_MESSAGE)
+                    except ValueError as e:
+                        pose_stream_stats.rejected_messages += 1
+                        await websocket.send_text(json.dumps({"type": "error", "message": str(e)}))
+                        continue
+                    if queue.full() and not throttled:
+                        throttled = True
+                        pose_stream_stats.backpressure_events += 1
+                        await websocket.send_text(json.dumps({"type": "backpressure", "pending": queue.qsize()}))
+                    await queue.put(frames)
+                elif message.get("text") is not None:
+                    try:
+                        command = json.loads(message["text"])
+                    except json.JSONDecodeError:
+                        command = {}
+                    if command.get("type") == "end":
+                        break
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+        finally:
+            await queue.put(None)
+
+    async def process() -> None:
+        nonlocal throttled
+        while True:
+            batch = [await queue.get()]
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+            done = batch[-1] is None
+            chunks = [chunk for chunk in batch if chunk is not None]
+            if chunks:
+                frames = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+                cpu_before = stream.cpu_seconds
+                events = stream.process(frames)
+                pose_stream_stats.frames += frames.shape[0]
+                pose_stream_stats.cpu_seconds += stream.cpu_seconds - cpu_before
+                for event in events:
+                    await websocket.send_text(json.dumps(event))
+            if throttled and queue.qsize() <= MAX_PENDING // 2:
+                throttled = False
+                await websocket.send_text(json.dumps({"type": "resume"}))
+            if done:
+                return
+
+    receiver = asyncio.ensure_future(receive())
+    try:
+        await process()
+        await websocket.send_text(json.dumps(stream.summary()))
+        await websocket.close()
+    except (WebSocketDisconnect, RuntimeError):
+        # Client went away mid-send; nothing left to deliver
+        pass
+    finally:
+        receiver.cancel()
+        pose_stream_stats.active -= 1
@@ -0,0 +1,197 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Read-through cache for user profiles.
+# Profiles are read on nearly every page load but written rarely, so reads
+# are served from a bounded LRU with a TTL. Writes through the API invalidate
+# the entry; concurrent misses for the same user share a single query
+# (single-flight). Each cached profile carries an ETag so unchanged profiles
+# can be answered with 304 Not Modified. A TTL of 0 turns off caching but
+# keeps single-flight loads and ETags.
+
+def profile_etag(profile: Dict[str, Any]) -> str:
+    encoded = json.dumps(profile, sort_keys=True, default=str).encode("utf-8")
+    return '"' + hashlib.sha1(encoded).hexdigest() + '"'
+
+class ProfileCache:
+    def __init__(self, max_entries: int = 5000, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, Tuple[Dict[str, Any], str, float]]" = OrderedDict()
+        self.inflight: Dict[str, asyncio.Future] = {}
+        # Bumped when a write lands mid-load so that load cannot repopulate
+        # the cache with data older than the write
+        self.generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _lookup(self, user_id: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        entry = self.entries.get(user_id)
+        if entry is None:
+            return None
+        profile, etag, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self.entries[user_id]
+            return None
+        self.entries.move_to_end(user_id)
+        return profile, etag
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        cached = self._lookup(user_id)
+        if cached is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return cached[0]
+
+    def put(self, user_id: str, profile: Dict[str, Any]) -> str:
+        etag = profile_etag(profile)
+        if self.ttl <= 0:
+            return etag
+        self.entries[user_id] = (profile, etag, time.monotonic() + self.ttl)
+        self.entries.move_to_end(user_id)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return etag
+
+    def invalidate(self, user_id: str) -> None:
+        self.entries.pop(user_id, None)
+        if user_id in self.inflight:
+            self.generations[user_id] = self.generations.get(user_id, 0) + 1
+
+    async def get_or_load(
+        self,
+        user_id: str,
+        loader: Callable[[str], Awaitable[Optional[Dict[str, Any]]]]
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        cached = self._lookup(user_id)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        pending = self.inflight.get(user_id)
+        if pending is not None:
+            self.coalesced += 1
+            # shield: one waiter being cancelled must not cancel the shared load
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[user_id] = future
+        generation = self.generations.get(user_id, 0)
+        try:
+            profile = await loader(user_id)
+            etag = None
+            if profile is not None:
+                # Missing profiles are not cached; creation may happen outside this API
+                if self.generations.get(user_id, 0) == generation:
+                    etag = self.put(user_id, profile)
+                else:
+                    etag = profile_etag(profile)
+            future.set_result((profile, etag))
+            return profile, etag
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters re-raise it; mark retrieved so a lone failure is not logged as unhandled
+            future.exception()
+            raise
+        finally:
+            self.inflight.pop(user_id, None)
+            self.generations.pop(user_id, None)
+
+    async def get_or_load_many(
+        self,
+        user_ids: List[str],
+        loader: Callable[[List[str]], Awaitable[Dict[str, Optional[Dict[str, Any]]]]]
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        # get_or_load for several users with one loader call for all misses.
+        # The misses are registered as in flight, so single loads join this
+        # one and a write landing mid-load keeps its result out of the cache
+        user_ids = list(dict.fromkeys(user_ids))
+        profiles: Dict[str, Optional[Dict[str, Any]]] = {}
+        pending: Dict[str, asyncio.Future] = {}
+        missing: List[str] = []
+        for user_id in user_ids:
+            cached = self._lookup(user_id)
+            if cached is not None:
+                self.hits += 1
+                profiles[user_id] = cached[0]
+            elif user_id in self.inflight:
+                self.coalesced += 1
+                pending[user_id] = self.inflight[user_id]
+            else:
+                self.misses += 1
+                missing.append(user_id)
+
+        loop = asyncio.get_running_loop()
+        futures = {user_id: loop.create_future() for user_id in missing}
+        generations = {user_id: self.generations.get(user_id, 0) for user_id in missing}
+        self.inflight.update(futures)
+        try:
+            loaded = await loader(missing) if missing else {}
+            for user_id in missing:
+                profile = loaded.get(user_id)
+                etag = None
+                if profile is not None:
+                    if self.generations.get(user_id, 0) == generations[user_id]:
+                        etag = self.put(user_id, profile)
+                    else:
+                        etag = profile_etag(profile)
+                futures[user_id].set_result((profile, etag))
+                profiles[user_id] = profile
+        except asyncio.CancelledError:
+            for future in futures.values():
+                future.cancel()
+            raise
+        except Exception as e:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(e)
+                    future.exception()
+            raise
+        finally:
+            for user_id in missing:
+                self.inflight.pop(user_id, None)
+                self.generations.pop(user_id, None)
+
+        for user_id, future in pending.items():
+            profiles[user_id] = (await asyncio.shield(future))[0]
+        return {user_id: profiles[user_id] for user_id in user_ids}
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hitRatio": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0
+        }
+
+def profile_cache_from_env() -> ProfileCache:
+    # Invalidation only reaches the worker that handled the write; with
+    # several workers the others would keep serving the old profile (e.g.
+    # onboardingCompleted still false) until the TTL ran out, so caching is
+    # off there by default
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    ttl = float(os.getenv("PROFILE_CACHE_TTL_SECONDS", "0" if workers > 1 else "60"))
+    if workers > 1 and ttl > 0:
+        logger.warning(
+            "PROFILE_CACHE_TTL_SECONDS > 0 with several workers: a profile write is not seen by the other workers until the TTL runs out",
+            extra={"workers": workers, "ttl": ttl}
+        )
+    return ProfileCache(max_entries=int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", "5000")), ttl=ttl)
+
+profile_cache = profile_cache_from_env()
@@ -0,0 +1,92 @@
+import os
+import time
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from app.telemetry import supabase_latency
+
+# Data access for the `profiles` table.
+# The supabase-py client is synchronous, so every query runs on a small,
+# bounded thread pool instead of the event loop. A slow database then only
+# queues profile requests; chat requests keep being served.
+# The client itself is built on first use (normally from the FastAPI
+# lifespan), not at import: importing supabase is a large share of startup
+# time, and a missing SUPABASE_URL should fail readiness, not the import.
+
+PROFILES_TABLE = "profiles"
+
+def create_supabase_client() -> Any:
+    from supabase import create_client
+    return create_client(os.getenv("SUPABASE_URL", ""), os.getenv("SUPABASE_ANON_KEY", ""))
+
+class ProfileRepository:
+    def __init__(self, client_factory: Callable[[], Any], max_concurrency: int = 8):
+        self.client_factory = client_factory
+        self.client: Optional[Any] = None
+        self.connect_lock = threading.Lock()
+        self.max_concurrency = max_concurrency
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="supabase")
+        # Rows requested/written vs. actual queries, to show what batching saves
+        self.round_trips = 0
+        self.rows = 0
+
+    def connect(self) -> Any:
+        # Blocking; safe from the worker threads and from the lifespan
+        with self.connect_lock:
+            if self.client is None:
+                self.client = self.client_factory()
+        return self.client
+
+    async def _run(self, fn: Callable[..., Any], *args: Any, rows: int = 1) -> Any:
+        self.round_trips += 1
+        self.rows += rows
+        loop = asyncio.get_running_loop()
+        result, elapsed = await loop.run_in_executor(self.executor, functools.partial(self._timed, fn, *args))
+        supabase_latency.observe(elapsed, fn.__name__.lstrip("_"))
+        return result
+
+    @staticmethod
+    def _timed(fn: Callable[..., Any], *args: Any) -> Any:
+        # Timed on the worker thread: the round trip itself, not the pool wait
+        started = time.perf_counter()
+        result = fn(*args)
+        return result, time.perf_counter() - started
+
+    def _fetch(self, user_id: str) -> Optional[Dict[str, Any]]:
+        response = self.connect().table(PROFILES_TABLE).select("*").eq("id", user_id).execute()
+        data = response.data
+        if isinstance(data, list):
+            return data[0] if data else None
+        return data or None
+
+    def _fetch_many(self, user_ids: List[str]) -> List[Dict[str, Any]]:
+        return self.connect().table(PROFILES_TABLE).select("*").in_("id", user_ids).execute().data or []
+
+    def _update(self, user_id: str, fields: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return self.connect().table(PROFILES_TABLE).update(fields).eq("id", user_id).execute().data
+
+    def _upsert(self, rows: Any) -> List[Dict[str, Any]]:
+        return self.connect().table(PROFILES_TABLE).upsert(rows).execute().data
+
+    async def fetch(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return await self._run(self._fetch, user_id)
+
+    async def fetch_many(self, user_ids: List[str]) -> List[Dict[str, Any]]:
+        return await self._run(self._fetch_many, user_ids, rows=len(user_ids))
+
+    async def update(self, user_id: str, fields: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return await self._run(self._update, user_id, fields)
+
+    async def upsert(self, rows: Any) -> List[Dict[str, Any]]:
+        return await self._run(self._upsert, rows, rows=len(rows) if isinstance(rows, list) else 1)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"connected": self.client is not None, "roundTrips": self.round_trips, "rows": self.rows, "roundTripsSaved": self.rows - self.round_trips}
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+def repository_from_env(client_factory: Callable[[], Any] = create_supabase_client) -> ProfileRepository:
+    return ProfileRepository(client_factory, max_concurrency=int(os.getenv("SUPABASE_MAX_CONCURRENCY", "8")))
@@ -0,0 +1,92 @@
+import os
+import asyncio
+from typing import Any, Dict, List, Optional
+from app.profile_repository import ProfileRepository
+
+# Write-behind coalescing for profile updates.
+# Onboarding saves a profile one field at a time, and each PATCH used to be
+# its own upsert round trip. Updates are now held for a short window, merged
+# per user, and flushed together: one multi-row upsert per distinct column
+# set, because PostgREST bulk upserts require every row to have the same keys.
+# Callers still await their own write, so errors and returned rows are the same
+# as before.
+
+class ProfileWriteCoalescer:
+    def __init__(self, repository: ProfileRepository, window: float = 0.05, max_batch: int = 500):
+        self.repository = repository
+        self.window = window
+        self.max_batch = max_batch
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.waiters: Dict[str, List[asyncio.Future]] = {}
+        self.flush_task: Optional[asyncio.Task] = None
+        self.writes_submitted = 0
+        self.upserts_issued = 0
+
+    async def submit(self, user_id: str, fields: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # Later fields win when the same user writes twice inside one window
+        self.pending.setdefault(user_id, {}).update(fields)
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(user_id, []).append(future)
+        self.writes_submitted += 1
+
+        if len(self.pending) >= self.max_batch:
+            await self.flush()
+        elif self.flush_task is None:
+            self.flush_task = asyncio.ensure_future(self._flush_later())
+        return await future
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.window)
+        self.flush_task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        if not self.pending:
+            return
+        pending, waiters = self.pending, self.waiters
+        self.pending, self.waiters = {}, {}
+
+        groups: Dict[frozenset, List[Dict[str, Any]]] = {}
+        for user_id, fields in pending.items():
+            row = {**fields, "id": user_id}
+            groups.setdefault(frozenset(row), []).append(row)
+
+        await asyncio.gather(*(self._write_group(rows, waiters) for rows in groups.values()))
+
+    async def _write_group(self, rows: List[Dict[str, Any]], waiters: Dict[str, List[asyncio.Future]]) -> None:
+        self.upserts_issued += 1
+        try:
+            result = await self.repository.upsert(rows if len(rows) > 1 else rows[0])
+        except Exception as e:
+            for row in rows:
+                for future in waiters.get(row["id"], []):
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        by_id = {str(r.get("id")): r for r in result or []}
+        for row in rows:
+            written = by_id.get(str(row["id"]))
+            for future in waiters.get(row["id"], []):
+                if not future.done():
+                    future.set_result([written] if written else [])
+
+    async def drain(self) -> None:
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+            self.flush_task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "writesSubmitted": self.writes_submitted,
+            "upsertsIssued": self.upserts_issued,
+            "roundTripsSaved": self.writes_submitted - self.upserts_issued
+        }
+
+def coalescer_from_env(repository: ProfileRepository) -> ProfileWriteCoalescer:
+    return ProfileWriteCoalescer(
+        repository,
+        window=float(os.getenv("PROFILE_WRITE_WINDOW_MS", "50")) / 1000,
+        max_batch=int(os.getenv("PROFILE_WRITE_MAX_BATCH", "500"))
+    )
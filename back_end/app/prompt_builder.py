@@ -0,0 +1,192 @@
+import os
+import re
+import json
+import math
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any
+
+# Prompt construction for upstream chat completions.
+# Conversation history is fitted into a token budget: the newest turns are
+# kept verbatim, oversized turns are truncated, and turns that no longer fit
+# are folded into a short extractive summary. Summaries are cached per
+# conversation prefix so each new turn only summarizes what newly fell off.
+
+HISTORY_TOKEN_BUDGET = int(os.getenv("PROMPT_HISTORY_TOKENS", "1200"))
+MAX_TURN_TOKENS = int(os.getenv("PROMPT_MAX_TURN_TOKENS", "250"))
+MAX_HISTORY_TURNS = int(os.getenv("PROMPT_MAX_HISTORY_TURNS", "10"))
+SUMMARY_TOKEN_BUDGET = int(os.getenv("PROMPT_SUMMARY_TOKENS", "200"))
+MAX_HISTORY_ENTRIES = int(os.getenv("PROMPT_MAX_HISTORY_ENTRIES", "200"))
+MAX_CONTENT_CHARS = int(os.getenv("PROMPT_MAX_CONTENT_CHARS", "8000"))
+
+ALLOWED_ROLES = ("user", "assistant")
+
+# Chat format adds a few tokens of framing per message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_WORD_PIECES = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+def estimate_tokens(text: str) -> int:
+    # BPE tokenizers average roughly 4 characters per token for English words;
+    # punctuation and emoji are usually a token each
+    tokens = 0
+    for piece in _WORD_PIECES.findall(text):
+        tokens += max(1, math.ceil(len(piece) / 4))
+    return tokens
+
+def message_tokens(message: Dict[str, str]) -> int:
+    return estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+def validate_history(conversation_history: Any) -> List[Dict[str, str]]:
+    # Raises ValueError for anything the upstream would reject or we should not forward
+    if conversation_history is None:
+        return []
+    if not isinstance(conversation_history, list):
+        raise ValueError("conversationHistory must be a list")
+    if len(conversation_history) > MAX_HISTORY_ENTRIES:
+        raise ValueError(f"conversationHistory has more than {MAX_HISTORY_ENTRIES} entries")
+    for index, entry in enumerate(conversation_history):
+        if not isinstance(entry, dict):
+            raise ValueError(f"conversationHistory[{index}] must be an object")
+        if entry.get("role") not in ALLOWED_ROLES:
+            raise ValueError(f"conversationHistory[{index}].role must be one of {', '.join(ALLOWED_ROLES)}")
+        content = entry.get("content")
+        if not isinstance(content, str) or not content.strip():
+            raise ValueError(f"conversationHistory[{index}].content must be a non-empty string")
+        if len(content) > MAX_CONTENT_CHARS:
+            raise ValueError(f"conversationHistory[{index}].content exceeds {MAX_CONTENT_CHARS} characters")
+    # Drop any extra keys so only role/content reach the upstream
+    return [{"role": entry["role"], "content": entry["content"]} for entry in conversation_history]
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    if estimate_tokens(text) <= budget:
+        return text
+    used = 0
+    for match in _WORD_PIECES.finditer(text):
+        cost = max(1, math.ceil(len(match.group()) / 4))
+        if used + cost > budget:
+            return text[:match.start()].rstrip() + " …"
+        used += cost
+    return text
+
+def _summary_line(entry: Dict[str, str]) -> str:
+    # First sentence of the turn, capped, as "User: ..." / "Coach: ..."
+    first = re.split(r"(?<=[.!?])\s", entry["content"].strip(), maxsplit=1)[0]
+    speaker = "User" if entry["role"] == "user" else "Coach"
+    return f"{speaker}: {truncate_to_tokens(first, 30)}"
+
+class SummaryCache:
+    # Rolling summaries keyed by a digest of the conversation prefix they cover
+    def __init__(self, max_entries: int = 2000):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, List[str]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        lines = self.entries.get(key)
+        if lines is not None:
+            self.entries.move_to_end(key)
+        return lines
+
+    def put(self, key: str, lines: List[str]) -> None:
+        self.entries[key] = lines
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+summary_cache = SummaryCache()
+
+def summarize(dropped: List[Dict[str, str]]) -> str:
+    # Find the longest already-summarized prefix, then extend it turn by turn
+    digests = []
+    running = hashlib.sha1()
+    for entry in dropped:
+        running.update(json.dumps(entry, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        digests.append(running.hexdigest())
+
+    lines: List[str] = []
+    start = 0
+    for i in range(len(dropped) - 1, -1, -1):
+        cached = summary_cache.get(digests[i])
+        if cached is not None:
+            lines, start = list(cached), i + 1
+            break
+
+    for i in range(start, len(dropped)):
+        lines.append(_summary_line(dropped[i]))
+        # Keep the summary inside its own budget by forgetting the oldest lines
+        while len(lines) > 1 and estimate_tokens(" ".join(lines)) > SUMMARY_TOKEN_BUDGET:
+            lines.pop(0)
+        summary_cache.put(digests[i], list(lines))
+
+    return "Summary of the earlier conversation:\n" + "\n".join(lines)
+
+class PromptStats:
+    def __init__(self):
+        self.requests = 0
+        self.tokens_saved = 0
+        self.bytes_saved = 0
+        self.last: Optional[Dict[str, int]] = None
+
+    def record(self, naive: List[Dict[str, str]], built: List[Dict[str, str]]) -> None:
+        naive_tokens = sum(message_tokens(m) for m in naive)
+        built_tokens = sum(message_tokens(m) for m in built)
+        naive_bytes = len(json.dumps(naive, ensure_ascii=False).encode("utf-8"))
+        built_bytes = len(json.dumps(built, ensure_ascii=False).encode("utf-8"))
+        self.requests += 1
+        self.tokens_saved += naive_tokens - built_tokens
+        self.bytes_saved += naive_bytes - built_bytes
+        self.last = {
+            "tokens": built_tokens,
+            "tokensSaved": naive_tokens - built_tokens,
+            "bytes": built_bytes,
+            "bytesSaved": naive_bytes - built_bytes
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "tokensSaved": self.tokens_saved,
+            "bytesSaved": self.bytes_saved,
+            "last": self.last
+        }
+
+prompt_stats = PromptStats()
+
+def fit_history(conversation_history: List[Dict[str, str]], budget: int = HISTORY_TOKEN_BUDGET) -> List[Dict[str, str]]:
+    kept: List[Dict[str, str]] = []
+    used = 0
+    cut = 0
+    # Newest turns first; stop at the first turn that no longer fits
+    for index in range(len(conversation_history) - 1, -1, -1):
+        if len(kept) >= MAX_HISTORY_TURNS:
+            cut = index + 1
+            break
+        entry = conversation_history[index]
+        content = truncate_to_tokens(entry["content"], MAX_TURN_TOKENS)
+        cost = estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+        if used + cost > budget:
+            cut = index + 1
+            break
+        kept.append({"role": entry["role"], "content": content})
+        used += cost
+
+    if cut:
+        # The summary shares the same budget: give up the oldest verbatim turns to make room
+        while kept and used + SUMMARY_TOKEN_BUDGET > budget:
+            used -= message_tokens(kept.pop())
+            cut += 1
+        kept.reverse()
+        kept.insert(0, {"role": "system", "content": summarize(conversation_history[:cut])})
+        return kept
+
+    kept.reverse()
+    return kept
+
+def build_prompt(system_prompt: str, message: str, conversation_history: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    history = fit_history(conversation_history)
+    messages = [{"role": "system", "content": system_prompt}, *history, {"role": "user", "content": message}]
+
+    # What the previous builder would have sent: the last 10 turns verbatim
+    naive = [{"role": "system", "content": system_prompt}, *conversation_history[-10:], {"role": "user", "content": message}]
+    prompt_stats.record(naive, messages)
+    return messages
@@ -0,0 +1,213 @@
+import os
+import re
+import json
+import math
+import time
+import sqlite3
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Any
+
+# Response cache in front of the paid upstream.
+# Tier 1 is an exact match on (language, normalized message, history digest).
+# Tier 2 (optional) finds near-identical questions in the same conversation
+# context via cosine similarity over hashed character n-gram vectors.
+# Both tiers share one LRU+TTL bounded store; entries can be persisted to a
+# pluggable on-disk backend so they survive restarts.
+
+VECTOR_DIMENSIONS = 1024
+NGRAM_SIZE = 3
+
+def normalize_message(message: str) -> str:
+    message = re.sub(r"[^\w\s]", " ", message.lower())
+    return " ".join(message.split())
+
+def history_digest(conversation_history: List[Dict[str, str]]) -> str:
+    # The whole transcript: build_prompt keeps the newest turns verbatim and
+    # folds older ones into a summary, so any earlier turn can change the prompt
+    encoded = json.dumps(conversation_history, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+def embed(normalized: str) -> Dict[int, float]:
+    # Hashed character n-grams -> sparse unit vector
+    padded = f" {normalized} "
+    counts: Dict[int, float] = {}
+    for i in range(len(padded) - NGRAM_SIZE + 1):
+        gram = padded[i:i + NGRAM_SIZE]
+        index = int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=4).digest(), "little") % VECTOR_DIMENSIONS
+        counts[index] = counts.get(index, 0.0) + 1.0
+    norm = math.sqrt(sum(v * v for v in counts.values())) or 1.0
+    return {k: v / norm for k, v in counts.items()}
+
+def cosine(a: Dict[int, float], b: Dict[int, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+class CacheEntry:
+    __slots__ = ("key", "context", "normalized", "response", "expires_at", "vector")
+
+    def __init__(self, key: str, context: str, normalized: str, response: str, expires_at: float):
+        self.key = key
+        self.context = context
+        self.normalized = normalized
+        self.response = response
+        self.expires_at = expires_at
+        self.vector: Optional[Dict[int, float]] = None
+
+class SQLiteCacheBackend:
+    # Write-through persistence; the in-memory store stays the source of truth for reads
+    def __init__(self, path: str):
+        self.path = path
+        # Opened by load() from the lifespan, not at import
+        self.conn: Optional[sqlite3.Connection] = None
+
+    def connect(self) -> sqlite3.Connection:
+        if self.conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "key TEXT PRIMARY KEY, context TEXT, normalized TEXT, response TEXT, expires_at REAL)"
+            )
+            conn.commit()
+            self.conn = conn
+        return self.conn
+
+    def load(self, limit: int) -> List[Tuple[str, str, str, str, float]]:
+        self.connect()
+        self.conn.execute("DELETE FROM response_cache WHERE expires_at < ?", (time.time(),))
+        self.conn.commit()
+        rows = self.conn.execute(
+            "SELECT key, context, normalized, response, expires_at FROM response_cache "
+            "ORDER BY expires_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+        # Oldest first so the LRU order matches insertion order
+        return list(reversed(rows))
+
+    def save(self, entry: CacheEntry) -> None:
+        self.connect().execute(
+            "INSERT OR REPLACE INTO response_cache VALUES (?, ?, ?, ?, ?)",
+            (entry.key, entry.context, entry.normalized, entry.response, entry.expires_at)
+        )
+        self.conn.commit()
+
+    def delete(self, key: str) -> None:
+        self.connect().execute("DELETE FROM response_cache WHERE key = ?", (key,))
+        self.conn.commit()
+
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+class ResponseCache:
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl: float = 3600.0,
+        similarity_threshold: Optional[float] = None,
+        backend: Optional[SQLiteCacheBackend] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.backend = backend
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def load(self) -> None:
+        if not self.backend:
+            return
+        for key, context, normalized, response, expires_at in self.backend.load(self.max_entries):
+            self._insert(CacheEntry(key, context, normalized, response, expires_at))
+
+    def _keys(self, message: str, language: Optional[str], conversation_history: List[Dict[str, str]]) -> Tuple[str, str, str]:
+        normalized = normalize_message(message)
+        context = f"{language or ''}|{history_digest(conversation_history or [])}"
+        return f"{context}|{normalized}", context, normalized
+
+    def _remove(self, key: str) -> None:
+        self.entries.pop(key, None)
+        if self.backend:
+            self.backend.delete(key)
+
+    def _insert(self, entry: CacheEntry) -> None:
+        if self.similarity_threshold is not None:
+            entry.vector = embed(entry.normalized)
+        self.entries[entry.key] = entry
+        self.entries.move_to_end(entry.key)
+        while len(self.entries) > self.max_entries:
+            oldest, _ = self.entries.popitem(last=False)
+            self.evictions += 1
+            if self.backend:
+                self.backend.delete(oldest)
+
+    def get(self, message: str, language: Optional[str], conversation_history: List[Dict[str, str]]) -> Optional[str]:
+        key, context, normalized = self._keys(message, language, conversation_history)
+        now = time.time()
+
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry.expires_at > now:
+                self.entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry.response
+            self._remove(key)
+
+        if self.similarity_threshold is not None and normalized:
+            vector = embed(normalized)
+            best, best_score = None, self.similarity_threshold
+            for candidate in self.entries.values():
+                if candidate.context != context or candidate.expires_at <= now:
+                    continue
+                score = cosine(vector, candidate.vector)
+                if score >= best_score:
+                    best, best_score = candidate, score
+            if best is not None:
+                self.entries.move_to_end(best.key)
+                self.similar_hits += 1
+                return best.response
+
+        self.misses += 1
+        return None
+
+    def set(self, message: str, language: Optional[str], conversation_history: List[Dict[str, str]], response: str) -> None:
+        key, context, normalized = self._keys(message, language, conversation_history)
+        entry = CacheEntry(key, context, normalized, response, time.time() + self.ttl)
+        self._insert(entry)
+        if self.backend:
+            self.backend.save(entry)
+
+    def close(self) -> None:
+        if self.backend:
+            self.backend.close()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.exact_hits + self.similar_hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "exactHits": self.exact_hits,
+            "similarHits": self.similar_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRatio": round((self.exact_hits + self.similar_hits) / lookups, 3) if lookups else 0.0
+        }
+
+def cache_from_env() -> Optional[ResponseCache]:
+    if os.getenv("CHAT_CACHE_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+    threshold = os.getenv("CHAT_CACHE_SIMILARITY")
+    path = os.getenv("CHAT_CACHE_PATH")
+    return ResponseCache(
+        max_entries=int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "1000")),
+        ttl=float(os.getenv("CHAT_CACHE_TTL_SECONDS", "3600")),
+        similarity_threshold=float(threshold) if threshold else None,
+        backend=SQLiteCacheBackend(path) if path else None
+    )
+
+response_cache = cache_from_env()
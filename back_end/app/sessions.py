@@ -0,0 +1,231 @@
+import os
+import time
+import uuid
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Server-side chat sessions.
+# /api/chat hands back a sessionId; the client then sends only the new message
+# and the transcript is kept here. The in-process store suits a single worker;
+# the SQLite store (an append-only turn log) is shared by multiple uvicorn
+# workers on the same host. Its calls block (and can wait on another
+# worker's write lock), so callers on the event loop run them in a thread when
+# `blocking` is set.
+
+class Turn:
+    __slots__ = ("role", "content", "created_at")
+
+    def __init__(self, role: str, content: str, created_at: float):
+        self.role = role
+        self.content = content
+        self.created_at = created_at
+
+    def as_message(self) -> Dict[str, str]:
+        return {"role": self.role, "content": self.content}
+
+class Session:
+    __slots__ = ("turns", "last_access")
+
+    def __init__(self):
+        self.turns: List[Turn] = []
+        self.last_access = time.monotonic()
+
+class InMemorySessionStore:
+    blocking = False
+
+    def __init__(self, max_sessions: int = 10000, max_turns: int = 50, idle_timeout: float = 1800.0):
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self.idle_timeout = idle_timeout
+        self.sessions: "OrderedDict[str, Session]" = OrderedDict()
+
+    def _evict(self) -> None:
+        # Sessions are kept in access order, so idle ones sit at the front
+        cutoff = time.monotonic() - self.idle_timeout
+        while self.sessions:
+            oldest_id, oldest = next(iter(self.sessions.items()))
+            if oldest.last_access >= cutoff and len(self.sessions) <= self.max_sessions:
+                break
+            del self.sessions[oldest_id]
+
+    def _touch(self, session_id: str) -> Optional[Session]:
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        if time.monotonic() - session.last_access > self.idle_timeout:
+            del self.sessions[session_id]
+            return None
+        session.last_access = time.monotonic()
+        self.sessions.move_to_end(session_id)
+        return session
+
+    def create(self, history: Optional[List[Dict[str, str]]] = None) -> str:
+        session_id = uuid.uuid4().hex
+        self.sessions[session_id] = Session()
+        self._evict()
+        self.extend(session_id, history or [])
+        return session_id
+
+    def get_history(self, session_id: str) -> Optional[List[Dict[str, str]]]:
+        session = self._touch(session_id)
+        if session is None:
+            return None
+        return [turn.as_message() for turn in session.turns]
+
+    def append(self, session_id: str, role: str, content: str) -> None:
+        self.extend(session_id, [{"role": role, "content": content}])
+
+    def extend(self, session_id: str, entries: List[Dict[str, str]]) -> None:
+        session = self._touch(session_id)
+        if session is None:
+            return
+        now = time.time()
+        session.turns.extend(Turn(entry["role"], entry["content"], now) for entry in entries)
+        if len(session.turns) > self.max_turns:
+            del session.turns[:len(session.turns) - self.max_turns]
+
+    def clear(self, session_id: str) -> bool:
+        return self.sessions.pop(session_id, None) is not None
+
+    def connect(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, int]:
+        return {"sessions": len(self.sessions)}
+
+class SQLiteSessionStore:
+    blocking = True
+
+    def __init__(self, path: str, max_sessions: int = 10000, max_turns: int = 50, idle_timeout: float = 1800.0):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self.idle_timeout = idle_timeout
+        self.lock = threading.Lock()
+        # Opened by connect() (from the lifespan, or on first use), not at import
+        self.conn: Optional[sqlite3.Connection] = None
+        self.connect_lock = threading.Lock()
+
+    def connect(self) -> sqlite3.Connection:
+        with self.connect_lock:
+            if self.conn is None:
+                # WAL lets several worker processes read while one writes
+                conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.executescript(
+                    "CREATE TABLE IF NOT EXISTS chat_sessions (id TEXT PRIMARY KEY, last_access REAL NOT NULL);"
+                    "CREATE INDEX IF NOT EXISTS chat_sessions_last_access ON chat_sessions (last_access);"
+                    "CREATE TABLE IF NOT EXISTS chat_turns ("
+                    "session_id TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL, content TEXT NOT NULL, "
+                    "created_at REAL NOT NULL, PRIMARY KEY (session_id, seq)) WITHOUT ROWID;"
+                )
+                conn.commit()
+                self.conn = conn
+        return self.conn
+
+    def _evict(self) -> None:
+        cutoff = time.time() - self.idle_timeout
+        stale = "SELECT id FROM chat_sessions WHERE last_access < ?"
+        self.conn.execute(f"DELETE FROM chat_turns WHERE session_id IN ({stale})", (cutoff,))
+        self.conn.execute("DELETE FROM chat_sessions WHERE last_access < ?", (cutoff,))
+        overflow = self.conn.execute("SELECT COUNT(*) FROM chat_sessions").fetchone()[0] - self.max_sessions
+        if overflow > 0:
+            oldest = "SELECT id FROM chat_sessions ORDER BY last_access LIMIT ?"
+            self.conn.execute(f"DELETE FROM chat_turns WHERE session_id IN ({oldest})", (overflow,))
+            self.conn.execute(f"DELETE FROM chat_sessions WHERE id IN ({oldest})", (overflow,))
+
+    def _touch(self, session_id: str) -> bool:
+        cursor = self.conn.execute(
+            "UPDATE chat_sessions SET last_access = ? WHERE id = ? AND last_access >= ?",
+            (time.time(), session_id, time.time() - self.idle_timeout)
+        )
+        return cursor.rowcount > 0
+
+    def create(self, history: Optional[List[Dict[str, str]]] = None) -> str:
+        session_id = uuid.uuid4().hex
+        with self.lock, self.connect():
+            self._evict()
+            self.conn.execute("INSERT INTO chat_sessions VALUES (?, ?)", (session_id, time.time()))
+            now = time.time()
+            self.conn.executemany(
+                "INSERT INTO chat_turns VALUES (?, ?, ?, ?, ?)",
+                [(session_id, seq, e["role"], e["content"], now) for seq, e in enumerate((history or [])[-self.max_turns:])]
+            )
+        return session_id
+
+    def get_history(self, session_id: str) -> Optional[List[Dict[str, str]]]:
+        with self.lock, self.connect():
+            if not self._touch(session_id):
+                return None
+            rows = self.conn.execute(
+                "SELECT role, content FROM chat_turns WHERE session_id = ? ORDER BY seq DESC LIMIT ?",
+                (session_id, self.max_turns)
+            ).fetchall()
+        return [{"role": role, "content": content} for role, content in reversed(rows)]
+
+    def append(self, session_id: str, role: str, content: str) -> None:
+        self.extend(session_id, [{"role": role, "content": content}])
+
+    def extend(self, session_id: str, entries: List[Dict[str, str]]) -> None:
+        # Several turns (a question and its answer) in one transaction
+        with self.lock, self.connect():
+            if not self._touch(session_id):
+                return
+            first = self.conn.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM chat_turns WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+            now = time.time()
+            self.conn.executemany(
+                "INSERT INTO chat_turns VALUES (?, ?, ?, ?, ?)",
+                [(session_id, first + i, e["role"], e["content"], now) for i, e in enumerate(entries)]
+            )
+            # The log is append-only per turn; old turns are trimmed in bulk
+            last = first + len(entries) - 1
+            self.conn.execute("DELETE FROM chat_turns WHERE session_id = ? AND seq <= ?", (session_id, last - self.max_turns))
+
+    def clear(self, session_id: str) -> bool:
+        with self.lock, self.connect():
+            self.conn.execute("DELETE FROM chat_turns WHERE session_id = ?", (session_id,))
+            return self.conn.execute("DELETE FROM chat_sessions WHERE id = ?", (session_id,)).rowcount > 0
+
+    def close(self) -> None:
+        with self.connect_lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+    def stats(self) -> Dict[str, int]:
+        conn = self.connect()
+        with self.lock:
+            return {"sessions": conn.execute("SELECT COUNT(*) FROM chat_sessions").fetchone()[0]}
+
+def session_store_from_env():
+    options = dict(
+        max_sessions=int(os.getenv("CHAT_SESSION_MAX", "10000")),
+        max_turns=int(os.getenv("CHAT_SESSION_MAX_TURNS", "50")),
+        idle_timeout=float(os.getenv("CHAT_SESSION_IDLE_SECONDS", "1800"))
+    )
+    # In-memory sessions are per process: with several workers a follow-up
+    # turn usually lands on a worker that never saw the session, so sqlite
+    # (shared by every worker) is the default there
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    backend = os.getenv("CHAT_SESSION_BACKEND", "sqlite" if workers > 1 else "memory").lower()
+    if backend == "sqlite":
+        return SQLiteSessionStore(os.getenv("CHAT_SESSION_DB", "chat_sessions.db"), **options)
+    if workers > 1:
+        logger.warning(
+            "CHAT_SESSION_BACKEND=memory with several workers: chat context is lost whenever a turn reaches another worker",
+            extra={"workers": workers}
+        )
+    return InMemorySessionStore(**options)
+
+session_store = session_store_from_env()
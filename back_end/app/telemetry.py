@@ -0,0 +1,271 @@
+import os
+import io
+import sys
+import json
+import time
+import queue
+import pstats
+import asyncio
+import logging
+import threading
+import cProfile
+from bisect import bisect_left
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Logging, metrics and on-demand profiling.
+# Log records are handed to a queue and written by a background thread, so
+# request handlers never block on stdout. Metrics are kept in-process and
+# rendered in the Prometheus text format at /metrics. Profiling is opt-in:
+# with PROFILING_ENABLED=true, a request carrying `X-Profile: 1` is run under
+# cProfile and the profile is written to PROFILE_DIR if the request was slower
+# than PROFILE_SLOW_MS.
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------- logging
+
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        # Anything passed via `extra=` becomes a structured field
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+_listener: Optional[QueueListener] = None
+
+def setup_logging() -> None:
+    global _listener
+    if _listener is not None:
+        return
+    handler = logging.StreamHandler(sys.stdout)
+    if os.getenv("LOG_FORMAT", "json").lower() == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    # Unbounded: a slow stdout delays log output, never the request
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue()
+    root = logging.getLogger()
+    root.handlers = [QueueHandler(log_queue)]
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    # Per-request client logs are what /metrics is for
+    for name in ("httpx", "httpcore", "hpack"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+
+def shutdown_logging() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+# ---------------------------------------------------------------- metrics
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+def _labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def total(self) -> float:
+        return sum(self.values.values())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {value:g}")
+        return lines
+
+class Gauge:
+    def __init__(self, name: str, help_text: str, read: Callable[[], float]):
+        self.name = name
+        self.help_text = help_text
+        self.read = read
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge", f"{self.name} {self.read():g}"]
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self.series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                le_label = f'le="{le}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le_label)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+http_latency = Histogram("gimmify_http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status"))
+openai_latency = Histogram("gimmify_openai_request_duration_seconds", "Upstream chat completion latency by model", ("model", "outcome"))
+openai_ttft = Histogram("gimmify_openai_time_to_first_token_seconds", "Streaming time to first token by model", ("model",))
+chat_responses = Counter("gimmify_chat_responses_total", "Chat replies by source (cache, openai, fallback)", ("endpoint", "source"))
+supabase_latency = Histogram("gimmify_supabase_request_duration_seconds", "Supabase round-trip time by operation", ("operation",))
+admission_outcomes = Counter("gimmify_admission_outcomes_total", "Chat admission decisions (admitted, shared, rate_limited, deadline, upstream_cooldown)", ("outcome",))
+loop_lag = Histogram("gimmify_event_loop_lag_seconds", "Event loop scheduling delay", buckets=LAG_BUCKETS)
+
+def _fallback_ratio() -> float:
+    total = chat_responses.total()
+    fallbacks = sum(v for labels, v in chat_responses.values.items() if labels[1] == "fallback")
+    return fallbacks / total if total else 0.0
+
+def _resident_memory_bytes() -> float:
+    # Current RSS from /proc (Linux); 0 where that is not available
+    try:
+        with open("/proc/self/statm") as statm:
+            return float(int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE"))
+    except (OSError, ValueError, AttributeError):
+        return 0.0
+
+_last_lag = 0.0
+
+METRICS = [
+    http_latency,
+    openai_latency,
+    openai_ttft,
+    chat_responses,
+    Gauge("gimmify_chat_fallback_ratio", "Share of chat replies served by the fallback matcher", _fallback_ratio),
+    admission_outcomes,
+    supabase_latency,
+    loop_lag,
+    Gauge("gimmify_event_loop_lag_last_seconds", "Most recent event loop lag sample", lambda: _last_lag),
+    Gauge("process_resident_memory_bytes", "Resident memory size in bytes", _resident_memory_bytes),
+]
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+async def monitor_event_loop(interval: float = 0.5) -> None:
+    # Sleeps for `interval` and records how late the loop woke up
+    global _last_lag
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        _last_lag = max(0.0, loop.time() - started - interval)
+        loop_lag.observe(_last_lag)
+
+# ---------------------------------------------------------------- middleware
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "0"))
+_profile_lock = threading.Lock()
+
+def route_template(scope: Dict[str, Any]) -> str:
+    # "/api/profile/abc" -> "/api/profile/{user_id}", rebuilt from the path
+    # params so router prefixes are kept; keeps label cardinality bounded
+    if scope.get("route") is None:
+        return "unmatched"
+    segments = scope["path"].split("/")
+    for name, value in scope.get("path_params", {}).items():
+        for i in range(len(segments) - 1, -1, -1):
+            if segments[i] == str(value):
+                segments[i] = "{" + name + "}"
+                break
+    return "/".join(segments)
+
+class TelemetryMiddleware:
+    # Plain ASGI middleware: times each HTTP request until its last body
+    # chunk is sent (streamed responses included) and labels it with the
+    # matched route template rather than the raw path
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        profiler = self._start_profiler(scope)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            path = route_template(scope)
+            http_latency.observe(elapsed, scope["method"], path, str(status))
+            if profiler is not None:
+                self._finish_profiler(profiler, scope["method"], path, elapsed)
+
+    def _start_profiler(self, scope: Dict[str, Any]) -> Optional[cProfile.Profile]:
+        if not PROFILING_ENABLED or (b"x-profile", b"1") not in scope.get("headers", []):
+            return None
+        # cProfile sees the whole thread, so concurrent requests show up in
+        # the profile too; only one profiled request at a time
+        if not _profile_lock.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def _finish_profiler(self, profiler: cProfile.Profile, method: str, route: str, elapsed: float) -> None:
+        profiler.disable()
+        try:
+            if elapsed * 1000 < PROFILE_SLOW_MS:
+                return
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            name = f"{int(time.time() * 1000)}-{method}-{route.strip('/').replace('/', '_') or 'root'}.prof"
+            path = os.path.join(PROFILE_DIR, name)
+            profiler.dump_stats(path)
+            summary = io.StringIO()
+            pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(10)
+            logger.warning("request profiled", extra={"route": route, "duration_ms": round(elapsed * 1000, 1), "profile": path})
+            logger.debug(summary.getvalue())
+        finally:
+            _profile_lock.release()
@@ -0,0 +1,161 @@
+import os
+import math
+import sqlite3
+import threading
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Workout history: an append-only rep log plus pre-aggregated rollups.
+# Every recorded rep is kept in `workout_reps`, indexed by (user_id, ts).
+# Day/week/month totals are folded into `performance_rollups` in the same
+# transaction as the insert, so the performance page reads a handful of rows
+# per user no matter how many reps are behind them. Buckets are UTC; weeks
+# start on Monday and are keyed by that Monday's date.
+
+PERIODS = ("day", "week", "month")
+
+# (ts, weight in kg, range of motion in degrees or None)
+Rep = Tuple[float, float, Optional[float]]
+
+# Upper bounds on a rep's values. Rollups are running sums, so a single
+# infinite or absurd value would break every later read for that user
+MAX_WEIGHT_KG = 1000.0
+MAX_RANGE_OF_MOTION = 180.0
+
+def check_rep(ts: float, weight: float, rom: Optional[float]) -> None:
+    if not math.isfinite(ts):
+        raise ValueError("rep timestamp must be finite")
+    if not (math.isfinite(weight) and 0 <= weight <= MAX_WEIGHT_KG):
+        raise ValueError(f"rep weight must be between 0 and {MAX_WEIGHT_KG:g} kg")
+    if rom is not None and not (math.isfinite(rom) and 0 <= rom <= MAX_RANGE_OF_MOTION):
+        raise ValueError(f"rep range of motion must be between 0 and {MAX_RANGE_OF_MOTION:g} degrees")
+
+def day_bucket(day: int) -> Tuple[str, str, str]:
+    # Days since the epoch -> (day, week, month) bucket keys
+    d = date(1970, 1, 1) + timedelta(days=day)
+    monday = d - timedelta(days=d.weekday())
+    return d.isoformat(), monday.isoformat(), d.strftime("%Y-%m")
+
+class WorkoutStore:
+    def __init__(self, path: str = "workouts.db"):
+        self.path = path
+        self.lock = threading.Lock()
+        # Opened by connect() (from the lifespan, or on first use), not at import
+        self.conn: Optional[sqlite3.Connection] = None
+        self.connect_lock = threading.Lock()
+        self.reps_recorded = 0
+        self.rollup_reads = 0
+
+    def connect(self) -> sqlite3.Connection:
+        with self.connect_lock:
+            if self.conn is None:
+                # WAL lets several worker processes read while one writes
+                conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.executescript(
+                    "CREATE TABLE IF NOT EXISTS workout_sessions ("
+                    "user_id TEXT NOT NULL, session_id TEXT NOT NULL, exercise TEXT NOT NULL, started_at REAL NOT NULL, "
+                    "PRIMARY KEY (user_id, session_id)) WITHOUT ROWID;"
+                    "CREATE TABLE IF NOT EXISTS workout_reps ("
+                    "user_id TEXT NOT NULL, ts REAL NOT NULL, session_id TEXT NOT NULL, exercise TEXT NOT NULL, "
+                    "weight REAL NOT NULL, rom REAL);"
+                    "CREATE INDEX IF NOT EXISTS workout_reps_user_ts ON workout_reps (user_id, ts);"
+                    "CREATE TABLE IF NOT EXISTS performance_rollups ("
+                    "user_id TEXT NOT NULL, period TEXT NOT NULL, bucket TEXT NOT NULL, "
+                    "workouts INTEGER NOT NULL, reps INTEGER NOT NULL, volume REAL NOT NULL, "
+                    "rom_sum REAL NOT NULL, rom_count INTEGER NOT NULL, "
+                    "PRIMARY KEY (user_id, period, bucket)) WITHOUT ROWID;"
+                )
+                conn.commit()
+                self.conn = conn
+        return self.conn
+
+    def record_session(
+        self,
+        user_id: str,
+        session_id: str,
+        exercise: str,
+        started_at: float,
+        reps: Iterable[Rep]
+    ) -> Dict[str, int]:
+        # Appends reps to a session; a session counts as one workout, in the
+        # bucket of its start time, however many times reps are appended to it
+        reps = list(reps)
+        for rep in reps:
+            check_rep(*rep)
+        # Accumulate per day first: one dict update per rep, calendar math per distinct day
+        days: Dict[int, List[float]] = {}
+        for ts, weight, rom in reps:
+            totals = days.setdefault(int(ts // 86400), [0, 0, 0.0, 0.0, 0])
+            totals[1] += 1
+            totals[2] += weight
+            if rom is not None:
+                totals[3] += rom
+                totals[4] += 1
+
+        conn = self.connect()
+        with self.lock, conn:
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO workout_sessions VALUES (?, ?, ?, ?)",
+                (user_id, session_id, exercise, started_at)
+            ).rowcount
+            if inserted:
+                days.setdefault(int(started_at // 86400), [0, 0, 0.0, 0.0, 0])[0] += 1
+            conn.executemany(
+                "INSERT INTO workout_reps VALUES (?, ?, ?, ?, ?, ?)",
+                [(user_id, ts, session_id, exercise, weight, rom) for ts, weight, rom in reps]
+            )
+
+            buckets: Dict[Tuple[str, str], List[float]] = {}
+            for day, totals in days.items():
+                for period, bucket in zip(PERIODS, day_bucket(day)):
+                    merged = buckets.setdefault((period, bucket), [0, 0, 0.0, 0.0, 0])
+                    for i, value in enumerate(totals):
+                        merged[i] += value
+            conn.executemany(
+                "INSERT INTO performance_rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (user_id, period, bucket) DO UPDATE SET "
+                "workouts = workouts + excluded.workouts, reps = reps + excluded.reps, "
+                "volume = volume + excluded.volume, rom_sum = rom_sum + excluded.rom_sum, "
+                "rom_count = rom_count + excluded.rom_count",
+                [(user_id, period, bucket, *totals) for (period, bucket), totals in buckets.items()]
+            )
+        self.reps_recorded += len(reps)
+        return {"reps": len(reps), "newWorkout": bool(inserted)}
+
+    def rollups(self, user_id: str, period: str, limit: int = 12) -> List[Dict[str, Any]]:
+        if period not in PERIODS:
+            raise ValueError(f"period must be one of {', '.join(PERIODS)}")
+        conn = self.connect()
+        with self.lock:
+            self.rollup_reads += 1
+            rows = conn.execute(
+                "SELECT bucket, workouts, reps, volume, rom_sum, rom_count FROM performance_rollups "
+                "WHERE user_id = ? AND period = ? ORDER BY bucket DESC LIMIT ?",
+                (user_id, period, limit)
+            ).fetchall()
+        return [
+            {
+                "period": bucket,
+                "workoutCount": workouts,
+                "reps": reps,
+                "volume": round(volume, 1),
+                "averageRangeOfMotion": round(rom_sum / rom_count, 1) if rom_count else None
+            }
+            for bucket, workouts, reps, volume, rom_sum, rom_count in reversed(rows)
+        ]
+
+    def close(self) -> None:
+        with self.connect_lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+    def stats(self) -> Dict[str, int]:
+        return {"repsRecorded": self.reps_recorded, "rollupReads": self.rollup_reads}
+
+def workout_store_from_env() -> WorkoutStore:
+    return WorkoutStore(os.getenv("WORKOUT_DB", "workouts.db"))
+
+workout_store = workout_store_from_env()
@@ -0,0 +1,101 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+import random
+from collections import Counter
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import run_stub
+from benchmarks.bench_http_client import percentile
+
+# A burst of /api/chat requests, many of them repeated questions, against a
+# fake OpenAI server that answers 429 above a concurrency limit.
+# Runs the backend with admission control off and on and compares how many
+# calls reached the upstream, how many were rate limited, and how fast and
+# from where users got their answers.
+#
+#   cd back_end && python -m benchmarks.bench_admission
+
+BACKEND_ENV = {"OPENAI_API_KEY": "bench", "CHAT_CACHE_ENABLED": "false", "SUPABASE_URL": "http://127.0.0.1:9", "SUPABASE_ANON_KEY": "bench", "WORKOUT_DB": ":memory:"}
+
+QUESTIONS = [
+    "how do i squat deeper?", "deadlift form?", "best protein sources?", "how many sets for hypertrophy?",
+    "is cardio bad for gains?", "how long should i rest between sets?", "bench press grip width?",
+    "how to fix knee cave?", "creatine timing?", "how much sleep for recovery?", "shoulder press or lateral raise?",
+    "how to breathe when lifting?", "rep range for strength?", "warm up routine?", "how often train legs?",
+    "what to eat before training?", "pull up progression?", "lower back pain after deadlift?", "how to track macros?",
+    "when to deload?"
+]
+
+async def burst(backend_url: str, requests: int, seed: int) -> Dict[str, object]:
+    import httpx
+    rng = random.Random(seed)
+    # Popular questions get asked far more often than the rest
+    weights = [1 / (rank + 1) for rank in range(len(QUESTIONS))]
+    limits = httpx.Limits(max_connections=requests, max_keepalive_connections=requests)
+    async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+        async def one(i: int):
+            payload = {"message": rng.choices(QUESTIONS, weights)[0]}
+            started = time.perf_counter()
+            response = await client.post(f"{backend_url}/api/chat", json=payload)
+            return time.perf_counter() - started, response.json()["source"]
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+        health = (await client.get(f"{backend_url}/")).json()
+
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        "sources": Counter(source for _, source in results),
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+        "elapsed": elapsed,
+        "admission": health.get("admission")
+    }
+
+def run(enabled: bool, args) -> None:
+    stub_env = {
+        "FAKE_OPENAI_LATENCY_MS": str(args.latency_ms),
+        "FAKE_OPENAI_TOKEN_DELAY_MS": "0",
+        "FAKE_OPENAI_MAX_CONCURRENCY": str(args.upstream_limit)
+    }
+    backend_env = {
+        **BACKEND_ENV,
+        "ADMISSION_ENABLED": "true" if enabled else "false",
+        "ADMISSION_MAX_CONCURRENCY": str(args.upstream_limit),
+        # Every request comes from 127.0.0.1, i.e. one client as far as the
+        # per-client limiter is concerned; this measures the shared parts
+        "ADMISSION_USER_BURST": str(args.requests)
+    }
+    import httpx
+    with run_stub("benchmarks.stubs:openai_app", env=stub_env) as openai_url:
+        with run_stub("main:app", env={**backend_env, "OPENAI_BASE_URL": f"{openai_url}/v1"}) as backend_url:
+            result = asyncio.run(burst(backend_url, args.requests, args.seed))
+        upstream = httpx.get(f"{openai_url}/stats").json()
+
+    sources = result["sources"]
+    label = "admission on " if enabled else "admission off"
+    print(
+        f"{label}  upstream calls {upstream['requests']:5d}  429s {upstream['rateLimited']:5d}  "
+        f"peak upstream concurrency {upstream['peakInFlight']:4d}  "
+        f"openai {sources.get('openai', 0):4d}  fallback {sources.get('fallback', 0):4d}  "
+        f"p50 {result['p50'] * 1000:7.1f} ms  p99 {result['p99'] * 1000:7.1f} ms  wall {result['elapsed']:.2f} s"
+    )
+    if result["admission"]:
+        print(f"               outcomes {result['admission']['outcomes']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--upstream-limit", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    run(False, args)
+    run(True, args)
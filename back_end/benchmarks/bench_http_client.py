@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+from typing import Callable, Awaitable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import run_stub, free_port
+
+# Compares a fresh httpx.AsyncClient per chat (the old behaviour) against the
+# shared pooled client, at 1 / 50 / 500 concurrent chats.
+#
+#   cd back_end && python -m benchmarks.bench_http_client
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def run_level(call: Callable[[], Awaitable[object]], concurrency: int, total: int) -> dict:
+    latencies: List[float] = []
+    remaining = total
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "rps": len(latencies) / elapsed,
+    }
+
+async def main(levels: List[int], requests_per_level: int) -> None:
+    import httpx
+    from app.ai_engine import get_ai_response
+    from app.http_client import OPENAI_BASE_URL, close_http_client
+
+    async def per_request_client():
+        # Mirrors the pre-pooling code path: new client, new connection, every chat
+        async with httpx.AsyncClient() as client:
+            response = await client.post(
+                f"{OPENAI_BASE_URL}/chat/completions",
+                headers={"Authorization": "Bearer bench"},
+                json={"model": "gpt-4", "messages": [{"role": "user", "content": "deadlift form?"}]},
+                timeout=30.0
+            )
+            return response.json()
+
+    async def shared_client():
+        return await get_ai_response("deadlift form?", [])
+
+    print(f"{'mode':<12} {'conc':>5} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>9}")
+    for name, call in (("per-request", per_request_client), ("shared", shared_client)):
+        for concurrency in levels:
+            total = max(requests_per_level, concurrency * 2)
+            result = await run_level(call, concurrency, total)
+            print(f"{name:<12} {concurrency:>5} {result['p50_ms']:>9.1f} {result['p99_ms']:>9.1f} {result['rps']:>9.1f}")
+    await close_http_client()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    port = free_port()
+    with run_stub("benchmarks.stubs:openai_app", port, {"FAKE_OPENAI_LATENCY_MS": str(args.latency_ms), "FAKE_OPENAI_TOKEN_DELAY_MS": "0"}) as base_url:
+        # Must be set before app.http_client is imported
+        os.environ["OPENAI_BASE_URL"] = f"{base_url}/v1"
+        os.environ["OPENAI_API_KEY"] = "bench"
+        asyncio.run(main(args.levels, args.requests))
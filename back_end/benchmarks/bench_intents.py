@@ -0,0 +1,75 @@
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.intents import match_intent
+
+# Throughput of the compiled intent matcher versus the original sequential
+# substring if-chain, across message lengths.
+#
+#   cd back_end && python -m benchmarks.bench_intents
+
+# The pre-compilation routing order, kept verbatim as the baseline
+LEGACY_RULES = [
+    ("push_up", lambda m: any(k in m for k in ['push', 'push-up', 'pushup'])),
+    ("squat", lambda m: any(k in m for k in ['squat', 'leg'])),
+    ("cardio", lambda m: any(k in m for k in ['cardio', 'running', 'treadmill', 'jog'])),
+    ("plank", lambda m: any(k in m for k in ['plank', 'core'])),
+    ("pull_up", lambda m: any(k in m for k in ['pull', 'pull-up', 'chin'])),
+    ("chest_press", lambda m: 'chest press' in m and 'incline' not in m),
+    ("incline_chest_press", lambda m: 'incline chest press' in m or ('incline' in m and 'chest' in m)),
+    ("deadlift", lambda m: 'deadlift' in m or 'dead lift' in m),
+    ("lat_pulldown", lambda m: any(k in m for k in ['lat pulldown', 'lat pull down', 'lat pull-down'])),
+    ("shoulder_press", lambda m: 'shoulder press' in m or ('shoulder' in m and 'press' in m)),
+    ("nutrition", lambda m: any(k in m for k in ['protein', 'nutrition', 'diet', 'eat', 'food'])),
+    ("hydration", lambda m: any(k in m for k in ['water', 'hydrate', 'drink'])),
+    ("motivation", lambda m: any(k in m for k in ['motivation', 'motivate', 'encourage', 'help', 'stuck'])),
+    ("fatigue", lambda m: any(k in m for k in ['tired', 'exhausted', "can't"])),
+    ("greeting", lambda m: any(k in m for k in ['hello', 'hi', 'hey', 'start', 'begin'])),
+    ("thanks", lambda m: any(k in m for k in ['thank', 'thanks'])),
+    ("goodbye", lambda m: any(k in m for k in ['goodbye', 'bye', 'see you', 'quit'])),
+    ("workout_plan", lambda m: any(k in m for k in ['routine', 'plan', 'schedule', 'workout'])),
+    ("weight", lambda m: any(k in m for k in ['weight', 'lose', 'gain', 'fat'])),
+]
+
+def legacy_match(message: str):
+    lower_message = message.lower().strip()
+    for name, rule in LEGACY_RULES:
+        if rule(lower_message):
+            return name
+    return None
+
+FILLER = ("so yesterday my coach said that I should really focus more on form and keep "
+          "track of my progress over the next few months because consistency matters").split()
+TOPICS = ["deadlift", "chest press", "lat pulldown", "protein", "squats", "motivation", "shoulder press", "bye"]
+
+def make_messages(words: int, count: int, rng: random.Random):
+    messages = []
+    for _ in range(count):
+        body = [rng.choice(FILLER) for _ in range(max(0, words - 2))]
+        body.insert(rng.randrange(len(body) + 1), rng.choice(TOPICS))
+        messages.append(" ".join(body))
+    return messages
+
+def throughput(fn, messages) -> float:
+    started = time.perf_counter()
+    for message in messages:
+        fn(message)
+    return len(messages) / (time.perf_counter() - started)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    print(f"{'words':>6} {'legacy msg/s':>14} {'compiled msg/s':>15} {'speedup':>8}")
+    for words in (3, 20, 100, 500):
+        messages = make_messages(words, max(200, args.count // max(1, words // 10)), rng)
+        legacy = throughput(legacy_match, messages)
+        compiled = throughput(match_intent, messages)
+        print(f"{words:>6} {legacy:>14,.0f} {compiled:>15,.0f} {compiled / legacy:>7.2f}x")
@@ -0,0 +1,65 @@
+import os
+import sys
+import math
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.pose_analytics import JOINTS, compute_joint_angles, analyze_exercise
+from benchmarks.pose_frames import synthetic_frames
+
+# Pose analytics throughput: frames/sec when angles are computed one frame per
+# call (how BodyDetectionCamera.tsx does it, with Math.atan2 per joint) versus
+# one vectorized call over batches of 1k, 10k and 100k frames.
+#
+#   cd back_end && python -m benchmarks.bench_pose
+
+def scalar_angle(a, b, c) -> float:
+    radians = math.atan2(c[1] - b[1], c[0] - b[0]) - math.atan2(a[1] - b[1], a[0] - b[0])
+    angle = abs(radians * 180.0 / math.pi)
+    return 360 - angle if angle > 180 else angle
+
+def per_frame_python(frames) -> int:
+    rows = frames.tolist()
+    for frame in rows:
+        for a, b, c in JOINTS.values():
+            scalar_angle(frame[a], frame[b], frame[c])
+    return len(rows)
+
+def per_frame_numpy(frames) -> int:
+    for i in range(len(frames)):
+        compute_joint_angles(frames[i:i + 1])
+    return len(frames)
+
+def timed(fn, *args, min_seconds: float = 0.5) -> float:
+    # Returns frames/sec; repeats short runs until min_seconds has elapsed
+    processed = 0
+    started = time.perf_counter()
+    while True:
+        processed += fn(*args)
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            return processed / elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--exercise", default="chest_press")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    single = synthetic_frames(2000)
+    print(f"{'mode':<32} {'frames/sec':>14}")
+    print(f"{'per frame, python math.atan2':<32} {timed(per_frame_python, single):>14,.0f}")
+    print(f"{'per frame, numpy (batch of 1)':<32} {timed(per_frame_numpy, single):>14,.0f}")
+
+    for size in sizes:
+        frames = synthetic_frames(size, reps=max(1, size // 300))
+        angles_fps = timed(lambda f: len(compute_joint_angles(f)), frames)
+        full_fps = timed(lambda f: analyze_exercise(f, args.exercise)["frames"], frames)
+        print(f"{f'batch {size:,}, angles':<32} {angles_fps:>14,.0f}")
+        print(f"{f'batch {size:,}, angles+reps+phases':<32} {full_fps:>14,.0f}")
+
+    check = analyze_exercise(synthetic_frames(3000, reps=10), args.exercise)
+    print(f"sanity: {check['reps']} reps counted on a 10-rep clip, visible {check['visibleRatio']:.1%}")
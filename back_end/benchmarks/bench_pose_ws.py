@@ -0,0 +1,124 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import run_stub
+from benchmarks.pose_frames import synthetic_frames, write_recording, read_recording
+
+# Replays recorded pose streams through /ws/pose from local clients and
+# reports what one live session costs the server: CPU per frame (whole backend
+# process, read from the health endpoint before and after each level) and the
+# implied number of concurrent sessions per core.
+#
+#   cd back_end && python -m benchmarks.bench_pose_ws
+#   cd back_end && python -m benchmarks.bench_pose_ws --recordings a.bin b.bin --sessions 1,50
+
+async def replay(ws_url: str, messages: List[bytes], seconds: float, fps: float, frames_per_message: int, realtime: bool) -> Dict:
+    import websockets
+    interval = frames_per_message / fps
+    events: Dict[str, int] = {}
+
+    # Cleared on "backpressure", set again on "resume"
+    may_send = asyncio.Event()
+    may_send.set()
+
+    async with websockets.connect(ws_url, max_size=None) as ws:
+        async def read():
+            async for raw in ws:
+                message = json.loads(raw)
+                events[message["type"]] = events.get(message["type"], 0) + 1
+                if message["type"] == "backpressure":
+                    may_send.clear()
+                elif message["type"] == "resume":
+                    may_send.set()
+                elif message["type"] == "summary":
+                    return message
+
+        reader = asyncio.ensure_future(read())
+        started = time.perf_counter()
+        sent = 0
+        while time.perf_counter() - started < seconds:
+            await may_send.wait()
+            await ws.send(messages[sent % len(messages)])
+            sent += 1
+            delay = started + sent * interval - time.perf_counter() if realtime else 0
+            # Always yield: send() often completes without suspending, and a
+            # flooding sender would otherwise starve the reader and keepalives
+            await asyncio.sleep(max(delay, 0))
+        elapsed = time.perf_counter() - started
+        await ws.send(json.dumps({"type": "end"}))
+        summary = await reader
+
+    return {"summary": summary, "events": events, "messages": sent, "elapsed": elapsed}
+
+async def run_level(backend_url: str, recordings: List[List[bytes]], sessions: int, args) -> Dict:
+    import httpx
+    ws_url = backend_url.replace("http://", "ws://") + f"/ws/pose?exercise={args.exercise}&fps={args.fps}"
+    async with httpx.AsyncClient(base_url=backend_url) as client:
+        before = (await client.get("/")).json()["poseStreams"]
+        results = await asyncio.gather(*(
+            replay(ws_url, recordings[n % len(recordings)], args.seconds, args.fps, args.frames_per_message, not args.flood)
+            for n in range(sessions)
+        ))
+        after = (await client.get("/")).json()["poseStreams"]
+
+    stream_seconds = sum(r["elapsed"] for r in results)
+    frames = sum(r["summary"]["frames"] for r in results)
+    process_cpu = after["processCpuSeconds"] - before["processCpuSeconds"]
+    analysis_cpu = sum(r["summary"]["cpuMs"] for r in results) / 1000
+    return {
+        "sessions": sessions,
+        "frames": frames,
+        "framesPerSecond": frames / stream_seconds,
+        "cpuPerFrame": process_cpu / frames,
+        "analysisCpuPerFrame": analysis_cpu / frames,
+        "reps": sum(r["summary"]["reps"] for r in results),
+        "backpressure": sum(r["events"].get("backpressure", 0) for r in results)
+    }
+
+async def main(backend_url: str, recordings: List[List[bytes]], args) -> None:
+    levels = [int(n) for n in args.sessions.split(",")]
+    frame_bytes = len(recordings[0][0])
+    print(f"message size: {frame_bytes} bytes for {args.frames_per_message} frame(s)")
+    print(f"{'sessions':>8} {'frames':>9} {'fps/sess':>9} {'cpu us/f':>9} {'analysis':>9} {'sess/core':>10} {'reps':>6} {'backpr':>7}")
+    for sessions in levels:
+        r = await run_level(backend_url, recordings, sessions, args)
+        # A live session streams args.fps frames every second
+        per_core = 1 / (r["cpuPerFrame"] * args.fps) if r["cpuPerFrame"] > 0 else float("inf")
+        print(f"{r['sessions']:>8} {r['frames']:>9} {r['framesPerSecond']:>9.1f} "
+              f"{r['cpuPerFrame'] * 1e6:>9.1f} {r['analysisCpuPerFrame'] * 1e6:>9.1f} "
+              f"{per_core:>10.0f} {r['reps']:>6} {r['backpressure']:>7}")
+    print("cpu us/f: backend process CPU per frame; analysis: the part spent in pose analytics; "
+          f"sess/core: sessions at {args.fps:g} fps one core can sustain")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recordings", nargs="*", help="recorded /ws/pose message files; synthetic ones are generated if omitted")
+    parser.add_argument("--sessions", default="1,10,50,100")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--frames-per-message", type=int, default=1)
+    parser.add_argument("--exercise", default="chest_press")
+    parser.add_argument("--flood", action="store_true", help="send as fast as possible instead of at --fps")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = args.recordings
+        if not paths:
+            paths = []
+            for seed in range(3):
+                path = os.path.join(tmp, f"recording-{seed}.bin")
+                write_recording(path, synthetic_frames(1800, reps=20, seed=seed), args.frames_per_message)
+                paths.append(path)
+        recordings = [read_recording(path) for path in paths]
+
+        backend_env = {"SUPABASE_URL": "http://127.0.0.1:9", "SUPABASE_ANON_KEY": "bench", "CHAT_CACHE_ENABLED": "false"}
+        with run_stub("main:app", env=backend_env) as backend_url:
+            asyncio.run(main(backend_url, recordings, args))
@@ -0,0 +1,86 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import run_stub
+from benchmarks.bench_http_client import percentile
+
+# Shows that /api/chat latency stays flat while /api/profile/* is saturated
+# against a slow (fake) Supabase: profile queries wait on the bounded thread
+# pool instead of blocking the event loop.
+#
+#   cd back_end && python -m benchmarks.bench_profile_isolation
+
+async def chat_load(client, seconds: float, concurrency: int) -> List[float]:
+    latencies: List[float] = []
+    deadline = time.monotonic() + seconds
+
+    async def worker(n: int):
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            response = await client.post("/api/chat", json={"message": f"deadlift form? #{n}-{len(latencies)}"})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    return latencies
+
+async def profile_load(client, stop: asyncio.Event, concurrency: int) -> int:
+    completed = 0
+
+    async def worker(n: int):
+        nonlocal completed
+        while not stop.is_set():
+            await client.get(f"/api/profile/user-{n % 50}")
+            completed += 1
+
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    return completed
+
+async def main(backend_url: str, seconds: float, chat_concurrency: int, profile_concurrency: int) -> None:
+    import httpx
+    limits = httpx.Limits(max_connections=chat_concurrency + profile_concurrency + 10)
+    async with httpx.AsyncClient(base_url=backend_url, timeout=120, limits=limits) as client:
+        for n in range(50):
+            await client.post("/api/profile", json={"id": f"user-{n}", "email": f"user.{n}@example.com"})
+
+        idle = await chat_load(client, seconds, chat_concurrency)
+
+        stop = asyncio.Event()
+        profiles = asyncio.ensure_future(profile_load(client, stop, profile_concurrency))
+        await asyncio.sleep(1)
+        loaded = await chat_load(client, seconds, chat_concurrency)
+        stop.set()
+        profile_requests = await profiles
+
+    print(f"{'phase':<28} {'chats':>6} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, samples in (("chat only", idle), (f"chat + {profile_concurrency} profile loops", loaded)):
+        print(f"{name:<28} {len(samples):>6} {percentile(samples, 50) * 1000:>8.1f} {percentile(samples, 99) * 1000:>8.1f}")
+    print(f"profile requests completed under load: {profile_requests}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--chat-concurrency", type=int, default=10)
+    parser.add_argument("--profile-concurrency", type=int, default=200)
+    parser.add_argument("--supabase-latency-ms", type=float, default=300)
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+
+    with run_stub("benchmarks.stubs:openai_app", env={"FAKE_OPENAI_LATENCY_MS": "50", "FAKE_OPENAI_TOKEN_DELAY_MS": "0"}) as openai_url, \
+            run_stub("benchmarks.stubs:supabase_app", env={"FAKE_SUPABASE_LATENCY_MS": str(args.supabase_latency_ms)}) as supabase_url:
+        backend_env = {
+            "OPENAI_API_KEY": "bench",
+            "OPENAI_BASE_URL": f"{openai_url}/v1",
+            "SUPABASE_URL": supabase_url,
+            "SUPABASE_ANON_KEY": "bench",
+            "SUPABASE_MAX_CONCURRENCY": str(args.pool_size),
+            "CHAT_CACHE_ENABLED": "false"
+        }
+        with run_stub("main:app", env=backend_env) as backend_url:
+            asyncio.run(main(backend_url, args.seconds, args.chat_concurrency, args.profile_concurrency))
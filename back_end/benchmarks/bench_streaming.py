@@ -0,0 +1,79 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import run_stub
+
+# Time-to-first-token of /api/chat/stream versus full-response latency of
+# /api/chat, against a fake OpenAI server that streams token by token.
+# Also checks the pre-first-token fallback by pointing at a failing upstream.
+#
+#   cd back_end && python -m benchmarks.bench_streaming
+
+BACKEND_ENV = {"OPENAI_API_KEY": "bench", "CHAT_CACHE_ENABLED": "false", "SUPABASE_URL": "http://127.0.0.1:9", "SUPABASE_ANON_KEY": "bench"}
+
+async def read_stream(client, base_url: str) -> Tuple[float, float, List[dict]]:
+    started = time.perf_counter()
+    ttft = None
+    events = []
+    event_name = None
+    async with client.stream("POST", f"{base_url}/api/chat/stream", json={"message": "deadlift form?"}) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("event:"):
+                event_name = line[6:].strip()
+            elif line.startswith("data:"):
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+                events.append({"event": event_name or "message", **json.loads(line[5:])})
+                event_name = None
+    return ttft, time.perf_counter() - started, events
+
+async def main(backend_url: str, rounds: int) -> None:
+    import httpx
+    async with httpx.AsyncClient(timeout=60) as client:
+        full, ttfts, totals = [], [], []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            response = await client.post(f"{backend_url}/api/chat", json={"message": "deadlift form?"})
+            full.append(time.perf_counter() - started)
+            assert response.json()["source"] == "openai"
+
+            ttft, total, events = await read_stream(client, backend_url)
+            ttfts.append(ttft)
+            totals.append(total)
+            assert events[-1]["event"] == "done" and events[-1]["source"] == "openai"
+
+        print(f"/api/chat           full response  median {statistics.median(full) * 1000:8.1f} ms")
+        print(f"/api/chat/stream    first token    median {statistics.median(ttfts) * 1000:8.1f} ms")
+        print(f"/api/chat/stream    last event     median {statistics.median(totals) * 1000:8.1f} ms")
+
+async def check_fallback(backend_url: str) -> None:
+    import httpx
+    async with httpx.AsyncClient(timeout=60) as client:
+        _, _, events = await read_stream(client, backend_url)
+    assert events[-1]["source"] == "fallback", events
+    print("failing upstream  -> streamed fallback response OK")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    parser.add_argument("--token-delay-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    stub_env = {"FAKE_OPENAI_LATENCY_MS": str(args.latency_ms), "FAKE_OPENAI_TOKEN_DELAY_MS": str(args.token_delay_ms)}
+    with run_stub("benchmarks.stubs:openai_app", env=stub_env) as openai_url:
+        with run_stub("main:app", env={**BACKEND_ENV, "OPENAI_BASE_URL": f"{openai_url}/v1"}) as backend_url:
+            asyncio.run(main(backend_url, args.rounds))
+
+    failing_env = {"FAKE_OPENAI_LATENCY_MS": "5", "FAKE_OPENAI_ERROR_RATE": "1", "FAKE_OPENAI_ERROR_STATUS": "503"}
+    with run_stub("benchmarks.stubs:openai_app", env=failing_env) as openai_url:
+        with run_stub("main:app", env={**BACKEND_ENV, "OPENAI_BASE_URL": f"{openai_url}/v1"}) as backend_url:
+            asyncio.run(check_fallback(backend_url))
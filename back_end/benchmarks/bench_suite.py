@@ -0,0 +1,431 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import statistics
+import subprocess
+from contextlib import ExitStack
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import run_stub
+from benchmarks.bench_http_client import percentile
+from benchmarks.bench_intents import make_messages
+
+# Regression suite for the backend, against local stand-ins only.
+# Starts the fake OpenAI and fake PostgREST servers plus two backends (one
+# with an OpenAI key, one without, for the fallback path), then drives each
+# scenario with open-loop load: requests are sent on a fixed schedule
+# whatever the backend's pace, and latency is counted from the scheduled send
+# time, so a stall shows up as latency instead of as fewer requests. Backend
+# RSS is sampled from /metrics while each scenario runs.
+#
+# Each scenario runs --repeat times and keeps the best value of every metric,
+# so a one-off stall on a shared machine does not fail the run; a real
+# regression shows up in every repeat. Results are written as JSON and
+# compared with a stored baseline; any metric outside its tolerance fails the
+# run (exit code 1).
+#
+#   cd back_end && python -m benchmarks.bench_suite
+#   cd back_end && python -m benchmarks.bench_suite --scenarios chat_ai profile_get --duration 5
+#   cd back_end && python -m benchmarks.bench_suite --update-baseline
+#
+# The baseline is machine-specific: regenerate it with --update-baseline on
+# the machine that runs the comparison.
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "bench_suite_baseline.json")
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results", "bench_suite.json")
+
+TOPICS = ["deadlift", "squat", "chest press", "protein", "lat pulldown", "cardio", "shoulder press", "rest days"]
+
+# name -> (backend, default requests per second)
+SCENARIOS: Dict[str, Tuple[str, float]] = {
+    "chat_ai": ("ai", 40),
+    "chat_stream": ("ai", 20),
+    "chat_fallback": ("fallback", 200),
+    "profile_post": ("ai", 100),
+    "profile_get": ("ai", 150),
+    "profile_patch": ("ai", 100),
+    "intents": ("local", 0),
+}
+
+# (metric path, worse when "higher"/"lower", relative tolerance, absolute slack)
+# The slack keeps tiny values (a 2 ms p50) from failing on scheduler noise
+CHECKS = [
+    ("latency_ms.p50", "higher", 0.25, 2.0),
+    ("latency_ms.p90", "higher", 0.35, 5.0),
+    ("latency_ms.p99", "higher", 0.50, 10.0),
+    ("ttft_ms.p50", "higher", 0.25, 2.0),
+    ("throughput_rps", "lower", 0.15, 0.0),
+    ("error_rate", "higher", 0.0, 0.01),
+    ("ai_share", "lower", 0.0, 0.05),
+    ("rss_mb", "higher", 0.20, 5.0),
+]
+
+Send = Callable[[int], Awaitable[Optional[str]]]
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    # seconds -> ms percentiles
+    if not latencies:
+        return {}
+    return {
+        "p50": round(percentile(latencies, 50) * 1000, 2),
+        "p90": round(percentile(latencies, 90) * 1000, 2),
+        "p99": round(percentile(latencies, 99) * 1000, 2),
+        "max": round(max(latencies) * 1000, 2),
+        "mean": round(statistics.fmean(latencies) * 1000, 2),
+    }
+
+async def read_rss_mb(client) -> Optional[float]:
+    response = await client.get("/metrics")
+    for line in response.text.splitlines():
+        if line.startswith("process_resident_memory_bytes "):
+            value = float(line.split()[1])
+            return round(value / 2**20, 1) if value else None
+    return None
+
+async def sample_rss(client, stop: asyncio.Event, interval: float = 0.5) -> Optional[float]:
+    peak = None
+    while True:
+        rss = await read_rss_mb(client)
+        if rss is not None:
+            peak = rss if peak is None else max(peak, rss)
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+            return peak
+        except asyncio.TimeoutError:
+            pass
+
+async def open_loop(send: Send, rps: float, duration: float) -> Dict[str, Any]:
+    # Request i is due at start + i / rps; it is sent then, not when an
+    # earlier one finishes
+    loop = asyncio.get_running_loop()
+    total = max(1, int(rps * duration))
+    start = loop.time() + 0.05
+    latencies: List[float] = []
+    sources: Dict[str, int] = {}
+    errors = 0
+    finished = start
+
+    async def one(i: int, due: float) -> None:
+        nonlocal errors, finished
+        try:
+            source = await send(i)
+        except Exception:
+            errors += 1
+            return
+        now = loop.time()
+        latencies.append(now - due)
+        finished = max(finished, now)
+        if source:
+            sources[source] = sources.get(source, 0) + 1
+
+    tasks = []
+    for i in range(total):
+        due = start + i / rps
+        delay = due - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(one(i, due)))
+    await asyncio.gather(*tasks)
+
+    result = {
+        "target_rps": rps,
+        "duration_s": duration,
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4),
+        "throughput_rps": round(len(latencies) / max(finished - start, 1e-9), 1),
+        "latency_ms": summarize(latencies),
+        "sources": sources,
+    }
+    if sources:
+        result["ai_share"] = round(sum(n for s, n in sources.items() if s in ("openai", "cache")) / max(len(latencies), 1), 3)
+    return result
+
+# ---------------------------------------------------------------- scenarios
+
+def chat_send(client, rng: random.Random) -> Send:
+    async def send(i: int) -> Optional[str]:
+        # Distinct prompts and a new session per request: measures the
+        # upstream path, not the response cache or in-flight sharing
+        payload = {"message": f"how should I program {rng.choice(TOPICS)} in week {i}?"}
+        response = await client.post("/api/chat", json=payload)
+        response.raise_for_status()
+        return response.json()["source"]
+    return send
+
+def stream_send(client, rng: random.Random, ttfts: List[float]) -> Send:
+    async def send(i: int) -> Optional[str]:
+        started = time.perf_counter()
+        source = None
+        payload = {"message": f"cues for {rng.choice(TOPICS)} set {i}?"}
+        async with client.stream("POST", "/api/chat/stream", json=payload) as response:
+            response.raise_for_status()
+            first = True
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                if first:
+                    ttfts.append(time.perf_counter() - started)
+                    first = False
+                source = json.loads(line[5:]).get("source", source)
+        return source
+    return send
+
+def profile_post_send(client, users: int) -> Send:
+    async def send(i: int) -> Optional[str]:
+        user_id = f"bench-user-{i % users}"
+        response = await client.post("/api/profile", json={"id": user_id, "email": f"{user_id}@example.com", "firstName": "Bench"})
+        response.raise_for_status()
+        return None
+    return send
+
+def profile_get_send(client, users: int, rng: random.Random) -> Send:
+    async def send(i: int) -> Optional[str]:
+        response = await client.get(f"/api/profile/bench-user-{rng.randrange(users)}")
+        response.raise_for_status()
+        return None
+    return send
+
+def profile_patch_send(client, users: int, rng: random.Random) -> Send:
+    async def send(i: int) -> Optional[str]:
+        response = await client.patch(f"/api/profile/bench-user-{rng.randrange(users)}", json={"weight": rng.randint(50, 120)})
+        response.raise_for_status()
+        return None
+    return send
+
+def run_intents(duration: float, seed: int) -> Dict[str, Any]:
+    # In-process: the matcher is CPU-bound, so this is a closed loop over a
+    # fixed mix of short and long messages
+    from app.intents import match_intent
+    rng = random.Random(seed)
+    messages = make_messages(3, 2000, rng) + make_messages(20, 2000, rng) + make_messages(100, 500, rng)
+    rng.shuffle(messages)
+    latencies: List[float] = []
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        for message in messages:
+            t = time.perf_counter()
+            match_intent(message)
+            latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - started
+    return {
+        "duration_s": duration,
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "latency_ms": {k: round(v, 4) for k, v in summarize(latencies).items()},
+    }
+
+async def run_http_scenario(name: str, base_url: str, rps: float, args) -> Dict[str, Any]:
+    import httpx
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=2000, max_keepalive_connections=500)
+    ttfts: List[float] = []
+    async with httpx.AsyncClient(base_url=base_url, timeout=30, limits=limits) as client:
+        if name in ("chat_ai", "chat_fallback"):
+            send = chat_send(client, rng)
+        elif name == "chat_stream":
+            send = stream_send(client, rng, ttfts)
+        elif name == "profile_post":
+            send = profile_post_send(client, args.users)
+        elif name == "profile_get":
+            send = profile_get_send(client, args.users, rng)
+        else:
+            send = profile_patch_send(client, args.users, rng)
+
+        # Warm up connections and lazily built state; not measured
+        await asyncio.gather(*(send(-1 - i) for i in range(10)))
+        ttfts.clear()
+
+        stop = asyncio.Event()
+        sampler = asyncio.ensure_future(sample_rss(client, stop))
+        result = await open_loop(send, rps, args.duration)
+        stop.set()
+        result["rss_mb"] = await sampler
+    if ttfts:
+        result["ttft_ms"] = summarize(ttfts)
+    return result
+
+def best_of(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # Best value per metric across repeats: lowest latency/errors/RSS,
+    # highest throughput and AI share
+    merged = json.loads(json.dumps(runs[0]))
+    for key in ("latency_ms", "ttft_ms"):
+        if key in merged:
+            for stat in merged[key]:
+                merged[key][stat] = min(run[key][stat] for run in runs)
+    for path, worse, _, _ in CHECKS:
+        values = [lookup(run, path) for run in runs]
+        values = [value for value in values if value is not None]
+        if values and "." not in path:
+            merged[path] = min(values) if worse == "higher" else max(values)
+    merged["repeats"] = len(runs)
+    return merged
+
+# ---------------------------------------------------------------- baseline
+
+def lookup(metrics: Dict[str, Any], path: str) -> Optional[float]:
+    value: Any = metrics
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value if isinstance(value, (int, float)) else None
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance_scale: float) -> List[str]:
+    regressions = []
+    print(f"\n{'scenario':<15} {'metric':<16} {'baseline':>10} {'current':>10} {'limit':>10}")
+    for name, current in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            print(f"{name:<15} (not in baseline)")
+            continue
+        for path, worse, rel, slack in CHECKS:
+            old, new = lookup(base, path), lookup(current, path)
+            if old is None or new is None:
+                continue
+            rel *= tolerance_scale
+            slack *= tolerance_scale
+            if worse == "higher":
+                limit = old * (1 + rel) + slack
+                failed = new > limit
+            else:
+                limit = old * (1 - rel) - slack
+                failed = new < limit
+            mark = "  REGRESSION" if failed else ""
+            print(f"{name:<15} {path:<16} {old:>10g} {new:>10g} {limit:>10.4g}{mark}")
+            if failed:
+                regressions.append(f"{name} {path}: {new:g} vs baseline {old:g} (limit {limit:.4g})")
+    return regressions
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# ---------------------------------------------------------------- main
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--duration", type=float, default=5, help="seconds of load per scenario run")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scenario; the best of them is kept")
+    parser.add_argument("--rps-scale", type=float, default=1.0, help="multiplies every scenario's request rate")
+    parser.add_argument("--users", type=int, default=500, help="distinct profiles used by the profile scenarios")
+    parser.add_argument("--openai-latency-ms", type=float, default=50)
+    parser.add_argument("--openai-token-delay-ms", type=float, default=5)
+    parser.add_argument("--openai-error-rate", type=float, default=0)
+    parser.add_argument("--supabase-latency-ms", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the baseline instead of comparing")
+    parser.add_argument("--tolerance-scale", type=float, default=1.0, help="loosen (>1) or tighten (<1) every check")
+    args = parser.parse_args()
+
+    config = {
+        "duration_s": args.duration,
+        "repeat": args.repeat,
+        "rps_scale": args.rps_scale,
+        "users": args.users,
+        "openai_latency_ms": args.openai_latency_ms,
+        "openai_token_delay_ms": args.openai_token_delay_ms,
+        "openai_error_rate": args.openai_error_rate,
+        "supabase_latency_ms": args.supabase_latency_ms,
+    }
+    results: Dict[str, Any] = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "config": config,
+        },
+        "scenarios": {},
+    }
+
+    backends_needed = {SCENARIOS[name][0] for name in args.scenarios} - {"local"}
+    with ExitStack() as stack:
+        backends: Dict[str, str] = {}
+        if backends_needed:
+            openai_url = stack.enter_context(run_stub("benchmarks.stubs:openai_app", env={
+                "FAKE_OPENAI_LATENCY_MS": str(args.openai_latency_ms),
+                "FAKE_OPENAI_TOKEN_DELAY_MS": str(args.openai_token_delay_ms),
+                "FAKE_OPENAI_ERROR_RATE": str(args.openai_error_rate),
+            }))
+            supabase_url = stack.enter_context(run_stub("benchmarks.stubs:supabase_app", env={
+                "FAKE_SUPABASE_LATENCY_MS": str(args.supabase_latency_ms),
+            }))
+            backend_env = {
+                "SUPABASE_URL": supabase_url,
+                "SUPABASE_ANON_KEY": "bench",
+                "OPENAI_BASE_URL": f"{openai_url}/v1",
+                "CHAT_CACHE_ENABLED": "false",
+                "WORKOUT_DB": ":memory:",
+                "LOG_LEVEL": "WARNING",
+                # All load comes from one address, which the per-client chat
+                # limiter would throttle; the suite measures throughput, not it
+                "ADMISSION_USER_RATE": "100000",
+                "ADMISSION_USER_BURST": "100000",
+            }
+            if "ai" in backends_needed:
+                backends["ai"] = stack.enter_context(run_stub("main:app", env={**backend_env, "OPENAI_API_KEY": "bench"}))
+            if "fallback" in backends_needed:
+                backends["fallback"] = stack.enter_context(run_stub("main:app", env={**backend_env, "OPENAI_API_KEY": ""}))
+
+        for name in args.scenarios:
+            backend, rps = SCENARIOS[name]
+            runs = []
+            for _ in range(max(1, args.repeat)):
+                if backend == "local":
+                    runs.append(run_intents(args.duration, args.seed))
+                else:
+                    runs.append(asyncio.run(run_http_scenario(name, backends[backend], rps * args.rps_scale, args)))
+            result = results["scenarios"][name] = best_of(runs)
+            latency = result["latency_ms"]
+            print(
+                f"{name:<15} {result['throughput_rps']:>10,.1f} req/s  p50 {latency.get('p50', 0):>8.3f} ms  "
+                f"p99 {latency.get('p99', 0):>8.3f} ms  errors {result.get('errors', 0):>4}  "
+                f"rss {result.get('rss_mb') or '-'} MB"
+            )
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nresults written to {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("meta", {}).get("config") != config:
+        print("warning: baseline was recorded with a different configuration; comparisons may not be meaningful")
+
+    regressions = compare(results, baseline, args.tolerance_scale)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s):")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("\nno regressions against baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.workout_store import WorkoutStore
+from benchmarks.bench_http_client import percentile
+
+# Loads synthetic workout history (10M reps by default) into the workout
+# store, then compares serving the performance page from the pre-aggregated
+# rollups against computing the same numbers by scanning the rep log.
+#
+#   cd back_end && python -m benchmarks.bench_workouts
+#   cd back_end && python -m benchmarks.bench_workouts --reps 1000000 --users 200
+
+EXERCISES = ["chest_press", "deadlift", "lat_pulldown", "shoulder_press"]
+DAY = 86400
+
+SCAN_QUERIES = {
+    "month": "strftime('%Y-%m', ts, 'unixepoch')",
+    "week": "date(ts, 'unixepoch', 'weekday 0', '-6 days')",
+    "day": "date(ts, 'unixepoch')",
+}
+
+def load(store: WorkoutStore, total_reps: int, users: int, reps_per_session: int, seed: int) -> float:
+    rng = random.Random(seed)
+    start = time.time() - 365 * DAY
+    sessions = total_reps // reps_per_session
+    started = time.perf_counter()
+    for n in range(sessions):
+        user = f"user-{rng.randrange(users)}"
+        began = start + rng.random() * 365 * DAY
+        weight = rng.choice((20.0, 40.0, 60.0, 80.0, 100.0))
+        reps = [(began + i * 4.0, weight, rng.uniform(70, 120)) for i in range(reps_per_session)]
+        store.record_session(user, f"s{n}", rng.choice(EXERCISES), began, reps)
+        if n and n % 50000 == 0:
+            print(f"  {n * reps_per_session:>11,} reps loaded", flush=True)
+    return time.perf_counter() - started
+
+def scan_rollups(store: WorkoutStore, user_id: str, period: str, limit: int):
+    # The same rollup computed from raw rows via the (user_id, ts) index;
+    # a workout counts in the bucket its session started in
+    reps_bucket = SCAN_QUERIES[period]
+    sessions_bucket = reps_bucket.replace("ts", "started_at")
+    reps = store.conn.execute(
+        f"SELECT {reps_bucket} AS bucket, COUNT(*), SUM(weight), AVG(rom) "
+        f"FROM workout_reps WHERE user_id = ? GROUP BY bucket ORDER BY bucket DESC LIMIT ?",
+        (user_id, limit)
+    ).fetchall()
+    workouts = dict(store.conn.execute(
+        f"SELECT {sessions_bucket} AS bucket, COUNT(*) FROM workout_sessions WHERE user_id = ? GROUP BY bucket",
+        (user_id,)
+    ).fetchall())
+    return [(bucket, workouts.get(bucket, 0), count, volume, rom) for bucket, count, volume, rom in reps]
+
+def timed_reads(fn, users: int, queries: int, seed: int):
+    rng = random.Random(seed)
+    samples = []
+    for _ in range(queries):
+        user = f"user-{rng.randrange(users)}"
+        started = time.perf_counter()
+        for period, limit in (("month", 12), ("week", 12), ("day", 30)):
+            fn(user, period, limit)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reps", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--reps-per-session", type=int, default=30)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--db", help="keep the database at this path instead of a temp file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = WorkoutStore(args.db or os.path.join(tmp, "workouts.db"))
+        print(f"loading {args.reps:,} reps for {args.users} users...")
+        elapsed = load(store, args.reps, args.users, args.reps_per_session, seed=1)
+        print(f"ingest: {args.reps / elapsed:,.0f} reps/s ({elapsed:.1f}s, rollups maintained on write)")
+
+        # Rollups must agree with a full recompute from the log
+        for period in ("month", "week", "day"):
+            fast = store.rollups("user-0", period, 500)
+            slow = list(reversed(scan_rollups(store, "user-0", period, 500)))
+            assert [(r["period"], r["workoutCount"], r["reps"]) for r in fast] == \
+                [(b, w, n) for b, w, n, _, _ in slow], f"{period} rollups disagree with the rep log"
+
+        rollup = timed_reads(store.rollups, args.users, args.queries, seed=2)
+        scan = timed_reads(lambda u, p, l: scan_rollups(store, u, p, l), args.users, args.queries, seed=2)
+        print(f"{'performance page (3 rollups)':<30} {'p50 ms':>8} {'p99 ms':>8}")
+        print(f"{'pre-aggregated':<30} {percentile(rollup, 50) * 1000:>8.3f} {percentile(rollup, 99) * 1000:>8.3f}")
+        print(f"{'scan rep log':<30} {percentile(scan, 50) * 1000:>8.3f} {percentile(scan, 99) * 1000:>8.3f}")
+        store.close()
@@ -0,0 +1,48 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.update({
+    "OPENAI_API_KEY": "check",
+    "CHAT_CACHE_ENABLED": "false",
+    "WORKOUT_DB": ":memory:",
+    "ADMISSION_ENABLED": "true",
+    "ADMISSION_USER_BURST": "5",
+    "ADMISSION_USER_RATE": "0.001",
+    "LOG_LEVEL": "CRITICAL",
+})
+
+# Checks that the per-client chat limiter cannot be reset from the client
+# side: a new sessionId on every request must not buy a fresh token bucket.
+# Runs in-process with the upstream call replaced, so it needs no servers.
+#
+#   cd back_end && python -m benchmarks.check_admission_keys
+
+import main
+from fastapi.testclient import TestClient
+
+async def fake_upstream(message, history):
+    return "upstream answer"
+
+main.get_ai_response = fake_upstream
+
+if __name__ == "__main__":
+    with TestClient(main.app) as client:
+        def sources(payloads):
+            return [client.post("/api/chat", json=payload).json()["source"] for payload in payloads]
+
+        # Distinct prompts so nothing is shared in flight
+        spoofed = sources([{"message": f"question {i}", "sessionId": f"spoof{i}"} for i in range(10)])
+        plain = sources([{"message": f"other question {i}"} for i in range(3)])
+
+    print(f"new sessionId per request: {spoofed}")
+    print(f"then without sessionId:    {plain}")
+    failures = []
+    if spoofed.count("openai") != 5:
+        failures.append(f"expected the burst of 5 to reach the upstream, got {spoofed.count('openai')}")
+    if "openai" in plain:
+        failures.append("changing sessionId reset or bypassed the client's bucket")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
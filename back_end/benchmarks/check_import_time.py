@@ -0,0 +1,79 @@
+import os
+import re
+import sys
+import argparse
+import tempfile
+import subprocess
+from typing import Dict, List, Tuple
+
+# Import-time budget for the backend.
+# Runs `python -X importtime -c "import main"` in a fresh interpreter (best of
+# a few runs, to ride out disk-cache noise) and fails when importing the app
+# takes longer than the budget, or when a module that is meant to be loaded
+# lazily - the Supabase client stack - is imported at all. Runs without any
+# Supabase settings, so it also checks that importing needs no outside service,
+# and in an empty working directory, which must still be empty afterwards:
+# the SQLite stores are opened by the lifespan, not at import.
+#
+#   cd back_end && python -m benchmarks.check_import_time [--budget-ms 700]
+
+BACK_END_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Built on first use by the profile repository, never at import
+LAZY_MODULES = ("supabase", "postgrest", "supabase_auth", "gotrue")
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+def measure(module: str) -> Tuple[float, Dict[str, float], List[str]]:
+    # -> (cumulative ms for `module`, top-level package -> cumulative ms,
+    #     files the import created in the working directory)
+    env = {k: v for k, v in os.environ.items() if not k.startswith("SUPABASE_")}
+    env.update({"PYTHONPATH": BACK_END_DIR, "PYTHONDONTWRITEBYTECODE": "1"})
+    with tempfile.TemporaryDirectory() as workdir:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=workdir, env=env, capture_output=True, text=True
+        )
+        created = sorted(os.listdir(workdir))
+    if result.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    total = 0.0
+    packages: Dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if not match:
+            continue
+        cumulative_ms = int(match.group(2)) / 1000
+        name = match.group(4)
+        if name == module:
+            total = cumulative_ms
+        top = name.split(".")[0]
+        packages[top] = max(packages.get(top, 0.0), cumulative_ms)
+    return total, packages, created
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "700")))
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    total, packages, created = min(runs, key=lambda run: run[0])
+
+    print(f"import {args.module}: {total:.1f} ms (best of {args.runs}, budget {args.budget_ms:.0f} ms)")
+    for name, ms in sorted(packages.items(), key=lambda item: -item[1])[:8]:
+        print(f"  {name:<24} {ms:8.1f} ms")
+
+    failures = []
+    if total > args.budget_ms:
+        failures.append(f"import {args.module} took {total:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+    eager = sorted(name for name in packages if name in LAZY_MODULES)
+    if eager:
+        failures.append(f"imported at startup but should be lazy: {', '.join(eager)}")
+    if created:
+        failures.append(f"import {args.module} created files: {', '.join(created)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,88 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.intents import match_intent
+from benchmarks.bench_intents import legacy_match
+
+# Routing regression table for the fallback intent matcher.
+# Each row is (message, intent the original if-chain picked, intent the
+# compiled matcher must pick). Rows where the two differ are deliberate
+# changes and say why; any other drift, in either direction, fails the check.
+#
+#   cd back_end && python -m benchmarks.check_intent_routings
+
+ROUTINGS = [
+    ("pullups?", "pull_up", "pull_up"),
+    ("pull-ups", "pull_up", "pull_up"),
+    ("chin-ups", "pull_up", "pull_up"),
+    ("chinups", "pull_up", "pull_up"),
+    ("squatting tips", "squat", "squat"),
+    ("squats", "squat", "squat"),
+    ("Shoulder-press form", "shoulder_press", "shoulder_press"),
+    ("shoulder press", "shoulder_press", "shoulder_press"),
+    # Hyphenated spelling of a keyword now matches too
+    ("dead-lift", None, "deadlift"),
+    ("deadlift form", "deadlift", "deadlift"),
+    ("dead lift", "deadlift", "deadlift"),
+    # The specific exercise beats the generic "pull" substring
+    ("lat pull-down", "pull_up", "lat_pulldown"),
+    ("lat pulldown tips", "pull_up", "lat_pulldown"),
+    ("lat pull down", "pull_up", "lat_pulldown"),
+    ("push-ups", "push_up", "push_up"),
+    ("pushups", "push_up", "push_up"),
+    ("incline chest press?", "incline_chest_press", "incline_chest_press"),
+    ("incline bench for chest", "incline_chest_press", "incline_chest_press"),
+    ("chest press", "chest_press", "chest_press"),
+    # Priority: the named exercise wins over a generic one mentioned after it
+    ("chest press vs push-ups", "push_up", "chest_press"),
+    ("plank hold", "plank", "plank"),
+    ("core work", "plank", "plank"),
+    ("treadmill intervals", "cardio", "cardio"),
+    ("jogging", "cardio", "cardio"),
+    ("running pace", "cardio", "cardio"),
+    ("cardio", "cardio", "cardio"),
+    # "legs" is its own intent with the same answer the squat branch gave
+    ("legs day", "squat", "legs"),
+    ("leg press", "squat", "legs"),
+    # Whole-word matching: "leg" inside another word no longer fires
+    ("college life", "squat", None),
+    ("protein shake", "nutrition", "nutrition"),
+    ("what should I eat", "nutrition", "nutrition"),
+    ("diet plan", "nutrition", "nutrition"),
+    ("water intake", "hydration", "hydration"),
+    ("drinking", "hydration", "hydration"),
+    ("hydrate", "hydration", "hydration"),
+    ("I need motivation", "motivation", "motivation"),
+    ("motivated?", "motivation", "motivation"),
+    ("feeling stuck", "motivation", "motivation"),
+    ("tired today", "fatigue", "fatigue"),
+    ("I can't go on", "fatigue", "fatigue"),
+    ("exhausted", "fatigue", "fatigue"),
+    ("plan my week", "workout_plan", "workout_plan"),
+    ("workout routine", "workout_plan", "workout_plan"),
+    ("lose fat", "weight", "weight"),
+    ("gain weight", "weight", "weight"),
+    ("hi there", "greeting", "greeting"),
+    ("hello", "greeting", "greeting"),
+    ("thanks!", "thanks", "thanks"),
+    ("thank you", "thanks", "thanks"),
+    ("bye", "goodbye", "goodbye"),
+    ("see you tomorrow", "goodbye", "goodbye"),
+    ("how to run", None, None),
+    ("what is a calorie", None, None),
+]
+
+if __name__ == "__main__":
+    failures = 0
+    for message, legacy, expected in ROUTINGS:
+        intent = match_intent(message)
+        current = intent["name"] if intent else None
+        old = legacy_match(message)
+        if current != expected or old != legacy:
+            failures += 1
+            print(f"FAIL {message!r}: if-chain {old!r} (table {legacy!r}), matcher {current!r} (table {expected!r})")
+    changed = sum(1 for _, legacy, expected in ROUTINGS if legacy != expected)
+    print(f"{len(ROUTINGS)} routings checked, {changed} deliberate changes, {failures} failures")
+    sys.exit(1 if failures else 0)
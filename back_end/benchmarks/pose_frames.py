@@ -0,0 +1,60 @@
+from typing import List
+import numpy as np
+from app.pose_analytics import (
+    LANDMARK_COUNT, LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_ELBOW, RIGHT_ELBOW,
+    LEFT_WRIST, RIGHT_WRIST, LEFT_HIP, RIGHT_HIP, LEFT_KNEE, RIGHT_KNEE,
+    LEFT_ANKLE, RIGHT_ANKLE
+)
+
+# Synthetic MediaPipe landmark streams for benchmarks: a lifter repeating a
+# pressing motion (elbows sweeping between ~60 and ~175 degrees) with noise
+# and occasional low-visibility frames.
+
+def synthetic_frames(n: int, reps: int = 10, fps: float = 30.0, seed: int = 0, occlusion: float = 0.02) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    frames = np.zeros((n, LANDMARK_COUNT, 4), dtype=np.float32)
+    frames[:, :, 3] = 0.95
+
+    t = np.arange(n) / max(n, 1)
+    # Elbow angle oscillates; rep count is `reps` full cycles
+    elbow = np.radians(117.5 - 57.5 * np.cos(2 * np.pi * reps * t))
+    for shoulder, elbow_idx, wrist, hip, knee, ankle, side in (
+        (LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST, LEFT_HIP, LEFT_KNEE, LEFT_ANKLE, -1),
+        (RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST, RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE, 1),
+    ):
+        x0 = 0.5 + side * 0.1
+        frames[:, shoulder, :2] = (x0, 0.3)
+        frames[:, elbow_idx, :2] = (x0 + side * 0.15, 0.3)
+        # Upper arm points outward; forearm rotates about the elbow
+        frames[:, wrist, 0] = x0 + side * 0.15 - side * 0.15 * np.cos(elbow)
+        frames[:, wrist, 1] = 0.3 - 0.15 * np.sin(elbow)
+        frames[:, hip, :2] = (x0, 0.6)
+        frames[:, knee, :2] = (x0, 0.8)
+        frames[:, ankle, :2] = (x0, 1.0)
+
+    frames[:, :, :2] += rng.normal(0, 0.002, size=(n, LANDMARK_COUNT, 2)).astype(np.float32)
+    hidden = rng.random(n) < occlusion
+    frames[hidden, :, 3] = 0.1
+    return frames
+
+# Recordings are the wire messages a client sent, back to back. Each message's
+# header carries its own frame count, so the file can be split without an index.
+
+def write_recording(path: str, frames: np.ndarray, frames_per_message: int = 1) -> None:
+    from app.pose_stream import encode_frames
+    with open(path, "wb") as f:
+        for sequence, start in enumerate(range(0, len(frames), frames_per_message)):
+            f.write(encode_frames(frames[start:start + frames_per_message], sequence))
+
+def read_recording(path: str) -> List[bytes]:
+    from app.pose_stream import HEADER
+    with open(path, "rb") as f:
+        data = f.read()
+    messages = []
+    offset = 0
+    while offset < len(data):
+        _, _, fields, landmarks, count, _ = HEADER.unpack_from(data, offset)
+        size = HEADER.size + count * landmarks * fields * 4
+        messages.append(data[offset:offset + size])
+        offset += size
+    return messages
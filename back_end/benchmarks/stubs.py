@@ -0,0 +1,174 @@
+import os
+import sys
+import time
+import random
+import socket
+import asyncio
+import json
+import subprocess
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Local stand-ins for the services the backend talks to.
+# Each stub is configured through environment variables so it can be spawned
+# in its own process (keeping its CPU off the benchmark's event loop).
+
+FAKE_OPENAI_LATENCY_MS = float(os.getenv("FAKE_OPENAI_LATENCY_MS", "50"))
+FAKE_OPENAI_ERROR_RATE = float(os.getenv("FAKE_OPENAI_ERROR_RATE", "0"))
+FAKE_OPENAI_ERROR_STATUS = int(os.getenv("FAKE_OPENAI_ERROR_STATUS", "500"))
+FAKE_OPENAI_TOKEN_DELAY_MS = float(os.getenv("FAKE_OPENAI_TOKEN_DELAY_MS", "10"))
+FAKE_OPENAI_REPLY = os.getenv("FAKE_OPENAI_REPLY", "Keep your back straight and drive through your heels! 💪")
+# Rate limit: more than this many concurrent completions get a 429 (0 = unlimited)
+FAKE_OPENAI_MAX_CONCURRENCY = int(os.getenv("FAKE_OPENAI_MAX_CONCURRENCY", "0"))
+FAKE_OPENAI_RETRY_AFTER = os.getenv("FAKE_OPENAI_RETRY_AFTER", "1")
+
+openai_app = FastAPI(title="Fake OpenAI")
+
+_openai_stats = {"requests": 0, "rateLimited": 0, "inFlight": 0, "peakInFlight": 0}
+
+@openai_app.get("/stats")
+async def fake_openai_stats():
+    return _openai_stats
+
+@openai_app.post("/v1/chat/completions")
+async def fake_chat_completions(request: Request):
+    _openai_stats["requests"] += 1
+    _openai_stats["inFlight"] += 1
+    _openai_stats["peakInFlight"] = max(_openai_stats["peakInFlight"], _openai_stats["inFlight"])
+    try:
+        return await _fake_completion(request)
+    finally:
+        _openai_stats["inFlight"] -= 1
+
+async def _fake_completion(request: Request):
+    payload = await request.json()
+    await asyncio.sleep(FAKE_OPENAI_LATENCY_MS / 1000)
+
+    if FAKE_OPENAI_MAX_CONCURRENCY and _openai_stats["inFlight"] > FAKE_OPENAI_MAX_CONCURRENCY:
+        _openai_stats["rateLimited"] += 1
+        return JSONResponse(
+            status_code=429,
+            headers={"Retry-After": FAKE_OPENAI_RETRY_AFTER},
+            content={"error": {"message": "Rate limit reached for requests"}}
+        )
+
+    if FAKE_OPENAI_ERROR_RATE and random.random() < FAKE_OPENAI_ERROR_RATE:
+        return JSONResponse(
+            status_code=FAKE_OPENAI_ERROR_STATUS,
+            content={"error": {"message": f"Injected failure ({FAKE_OPENAI_ERROR_STATUS})"}}
+        )
+
+    if payload.get("stream"):
+        return StreamingResponse(_fake_stream(payload.get("model")), media_type="text/event-stream")
+
+    # A buffered completion still pays for generating every token
+    await asyncio.sleep(FAKE_OPENAI_TOKEN_DELAY_MS * (len(FAKE_OPENAI_REPLY.split(" ")) - 1) / 1000)
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "model": payload.get("model"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": FAKE_OPENAI_REPLY},
+            "finish_reason": "stop"
+        }]
+    }
+
+async def _fake_stream(model: str):
+    # Same wire format as the real API: one `data:` chunk per token, then [DONE]
+    for index, token in enumerate(FAKE_OPENAI_REPLY.split(" ")):
+        if index:
+            await asyncio.sleep(FAKE_OPENAI_TOKEN_DELAY_MS / 1000)
+        chunk = {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion.chunk",
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": token if index == 0 else " " + token}}]
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+    yield "data: [DONE]\n\n"
+
+FAKE_SUPABASE_LATENCY_MS = float(os.getenv("FAKE_SUPABASE_LATENCY_MS", "20"))
+
+supabase_app = FastAPI(title="Fake Supabase PostgREST")
+
+# table -> primary key -> row
+FAKE_TABLES: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+def _matches(row: Dict[str, Any], request: Request) -> bool:
+    # Supports the two PostgREST filters the backend uses: col=eq.x and col=in.(x,y)
+    for column, expression in request.query_params.items():
+        if column in ("select", "on_conflict", "columns"):
+            continue
+        operator, _, value = expression.partition(".")
+        actual = str(row.get(column))
+        if operator == "eq" and actual != value:
+            return False
+        if operator == "in" and actual not in value.strip("()").split(","):
+            return False
+    return True
+
+@supabase_app.get("/rest/v1/{table}")
+async def fake_select(table: str, request: Request):
+    await asyncio.sleep(FAKE_SUPABASE_LATENCY_MS / 1000)
+    return [row for row in FAKE_TABLES.get(table, {}).values() if _matches(row, request)]
+
+@supabase_app.post("/rest/v1/{table}")
+async def fake_upsert(table: str, request: Request):
+    await asyncio.sleep(FAKE_SUPABASE_LATENCY_MS / 1000)
+    payload = await request.json()
+    rows: List[Dict[str, Any]] = payload if isinstance(payload, list) else [payload]
+    stored = FAKE_TABLES.setdefault(table, {})
+    result = []
+    for row in rows:
+        merged = {**stored.get(str(row.get("id")), {}), **row}
+        stored[str(row.get("id"))] = merged
+        result.append(merged)
+    return JSONResponse(status_code=201, content=result)
+
+@supabase_app.patch("/rest/v1/{table}")
+async def fake_update(table: str, request: Request):
+    await asyncio.sleep(FAKE_SUPABASE_LATENCY_MS / 1000)
+    changes = await request.json()
+    result = []
+    for row in FAKE_TABLES.get(table, {}).values():
+        if _matches(row, request):
+            row.update(changes)
+            result.append(row)
+    return result
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _wait_for_port(port: int, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Stub server on port {port} did not start")
+
+@contextmanager
+def run_stub(app_path: str, port: Optional[int] = None, env: Optional[Dict[str, str]] = None):
+    # Spawns `uvicorn <app_path>` from the back_end directory and yields its base URL
+    port = port or free_port()
+    back_end_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc_env = {**os.environ, **(env or {})}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app_path, "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning", "--backlog", "4096"],
+        cwd=back_end_dir,
+        env=proc_env,
+    )
+    try:
+        _wait_for_port(port)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
@@ -1,15 +1,72 @@
 import os
-from fastapi import FastAPI, Request
+import json
+import math
+import time
+import uuid
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, HTTPException, WebSocket, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Dict, Optional
-from app.ai_engine import get_ai_response, get_intelligent_response
-from app.auth import router as auth_router
-from dotenv import load_dotenv
+from fastapi.responses import StreamingResponse, PlainTextResponse, JSONResponse
+from pydantic import BaseModel, Field
+from typing import Any, Callable, List, Dict, Optional, Tuple
+from app.ai_engine import get_ai_response, get_intelligent_response, stream_ai_response, record_ttft, ttft_summary, model_router
+from app.auth import router as auth_router, profile_repository, profile_writer
+from app.http_client import start_http_client, close_http_client, http_client_ready
+from app.response_cache import response_cache
+from app.admission import admission_controller, prompt_key
+from app.prompt_builder import validate_history, prompt_stats, MAX_CONTENT_CHARS
+from app.sessions import session_store
+from app.profile_cache import profile_cache
+from app.pose_analytics import router as pose_router
+from app.pose_stream import PoseStream, serve_pose_socket, pose_stream_stats, MAX_FPS
+from app.performance import router as performance_router
+from app.workout_store import workout_store, MAX_WEIGHT_KG, MAX_RANGE_OF_MOTION
+from app.telemetry import (
+    setup_logging, shutdown_logging, monitor_event_loop, render_metrics, chat_responses, TelemetryMiddleware
+)
+
+setup_logging()
+
+logger = logging.getLogger(__name__)
+
+def database_configured() -> bool:
+    return bool(os.getenv("SUPABASE_URL"))
 
-load_dotenv()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled upstream client for the whole process lifetime
+    await start_http_client()
+    # Outside clients are built here, not at import, so a bad config shows
+    # up on /ready instead of crashing the worker. Chat-only workers have no
+    # database configured and skip it (same condition as /ready)
+    if database_configured():
+        try:
+            await asyncio.to_thread(profile_repository.connect)
+        except Exception as e:
+            logger.error("Supabase client could not be created", extra={"error": str(e)})
+    # Local SQLite files are opened here as well, so importing the app
+    # creates nothing on disk
+    await asyncio.to_thread(workout_store.connect)
+    await asyncio.to_thread(session_store.connect)
+    if response_cache:
+        response_cache.load()
+    lag_monitor = asyncio.ensure_future(monitor_event_loop())
+    yield
+    lag_monitor.cancel()
+    await close_http_client()
+    if response_cache:
+        response_cache.close()
+    session_store.close()
+    workout_store.close()
+    await profile_writer.drain()
+    profile_repository.close()
+    shutdown_logging()
 
-app = FastAPI(title="Gimmify Backend API")
+app = FastAPI(title="Gimmify Backend API", lifespan=lifespan)
 
 # Enable CORS for the frontend
 app.add_middleware(
@@ -27,52 +84,306 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Include Auth Router
+# Latency histograms for /metrics (outermost, so it times everything below it)
+app.add_middleware(TelemetryMiddleware)
+
+def json_safe(value: Any) -> Any:
+    if isinstance(value, float) and not math.isfinite(value):
+        return str(value)
+    if isinstance(value, dict):
+        return {k: json_safe(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [json_safe(v) for v in value]
+    return value
+
+@app.exception_handler(RequestValidationError)
+async def validation_error_handler(request: Request, exc: RequestValidationError):
+    # The default 422 body echoes the rejected input, and JSON has no
+    # Infinity/NaN: rejecting {"weight": Infinity} would itself end in a 500
+    return JSONResponse(status_code=422, content={"detail": json_safe(jsonable_encoder(exc.errors()))})
+
+# Include Routers
 app.include_router(auth_router, prefix="/api", tags=["auth"])
+app.include_router(pose_router, prefix="/api", tags=["pose"])
+app.include_router(performance_router, prefix="/api", tags=["performance"])
 
 class ChatMessage(BaseModel):
-    message: str
+    # Stored in the session and replayed as history on later turns, which
+    # skips validate_history, so the per-message limit applies here
+    message: str = Field(max_length=MAX_CONTENT_CHARS)
     language: Optional[str] = "en-US"
     conversationHistory: Optional[List[Dict[str, str]]] = []
+    sessionId: Optional[str] = None
+
+def validated_history(payload: ChatMessage) -> List[Dict[str, str]]:
+    # Malformed history never reaches the upstream
+    try:
+        return validate_history(payload.conversationHistory)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+async def session_call(fn: Callable[..., Any], *args: Any) -> Any:
+    # The sqlite store blocks, up to its busy timeout when another worker
+    # holds the write lock, so it runs in a thread; the in-memory store is
+    # quick and not thread-safe, so it stays on the loop
+    if session_store.blocking:
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
+
+async def resolve_session(payload: ChatMessage) -> Tuple[str, List[Dict[str, str]]]:
+    # Known session: the server already has the transcript, ignore any sent history
+    if payload.sessionId:
+        stored = await session_call(session_store.get_history, payload.sessionId)
+        if stored is not None:
+            return payload.sessionId, stored
+    # New or expired session: seed it with whatever history the client sent
+    history = validated_history(payload)
+    return await session_call(session_store.create, history), history
+
+async def remember_turn(session_id: str, message: str, response: str) -> None:
+    await session_call(session_store.extend, session_id, [
+        {"role": "user", "content": message},
+        {"role": "assistant", "content": response}
+    ])
 
 @app.get("/")
 async def health_check():
     return {
         "status": "ok",
         "message": "Gimmify FastAPI Backend is running",
-        "hasOpenAI": bool(os.getenv("OPENAI_API_KEY"))
+        "hasOpenAI": bool(os.getenv("OPENAI_API_KEY")),
+        "streamingTTFT": ttft_summary(),
+        "modelRouting": model_router.snapshot(),
+        "responseCache": response_cache.stats() if response_cache else None,
+        "prompt": prompt_stats.snapshot(),
+        "sessions": await session_call(session_store.stats),
+        "profileCache": profile_cache.stats(),
+        "profileWrites": profile_writer.stats(),
+        "database": profile_repository.stats(),
+        "poseStreams": pose_stream_stats.snapshot(),
+        "workouts": workout_store.stats(),
+        "admission": admission_controller.stats() if admission_controller else None
     }
 
+@app.get("/ready")
+async def readiness_check():
+    # Readiness (unlike the `/` liveness check): can this worker serve traffic?
+    # A worker without Supabase settings still serves chat and pose traffic,
+    # so the database only counts when it is configured (None = not configured)
+    database = None
+    if database_configured():
+        if profile_repository.client is None:
+            # Retry a client that failed at startup, e.g. config fixed by a secret reload
+            try:
+                await asyncio.to_thread(profile_repository.connect)
+            except Exception:
+                pass
+        database = profile_repository.client is not None
+    checks = {
+        "httpClient": http_client_ready(),
+        "database": database
+    }
+    ready = all(check is not False for check in checks.values())
+    return JSONResponse(status_code=200 if ready else 503, content={"status": "ready" if ready else "not ready", "checks": checks})
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.post("/api/chat")
-async def chat_endpoint(payload: ChatMessage):
-    print(f"Received chat message: {payload.message}")
+async def chat_endpoint(payload: ChatMessage, request: Request):
     message = payload.message
     language = payload.language
-    history = payload.conversationHistory
+    session_id, history = await resolve_session(payload)
+    
+    cached = response_cache.get(message, language, history) if response_cache else None
+    if cached:
+        await remember_turn(session_id, message, cached)
+        chat_responses.inc("chat", "cache")
+        return {
+            "response": cached,
+            "type": "ai",
+            "language": language,
+            "source": "cache",
+            "sessionId": session_id
+        }
     
-    # Try AI response first
-    ai_response = await get_ai_response(message, history)
+    # Try AI response first - through admission control, which may share an
+    # identical in-flight call or send us straight to the fallback
+    if admission_controller:
+        # Limited per client address, not per sessionId: ids come from the
+        # client and new sessions are free, so keying on them would let a
+        # client reset its bucket at will. A shared network (a gym's NAT)
+        # shares one bucket, which the defaults are sized for (see
+        # app/admission.py). Behind a reverse proxy, run uvicorn with
+        # --proxy-headers so this is the real client address.
+        user = request.client.host if request.client else "anonymous"
+        ai_response = await admission_controller.run(
+            user,
+            prompt_key(message, language, history),
+            lambda: get_ai_response(message, history)
+        )
+    else:
+        ai_response = await get_ai_response(message, history)
     
     if ai_response:
+        if response_cache:
+            response_cache.set(message, language, history, ai_response)
+        await remember_turn(session_id, message, ai_response)
+        chat_responses.inc("chat", "openai")
         return {
             "response": ai_response,
             "type": "ai",
             "language": language,
-            "source": "openai"
+            "source": "openai",
+            "sessionId": session_id
         }
     
     # Fallback response
-    print("Using fallback response - AI not available")
     fallback = get_intelligent_response(message, history)
+    await remember_turn(session_id, message, fallback)
+    chat_responses.inc("chat", "fallback")
     
     return {
         "response": fallback,
         "type": "fallback",
         "language": language,
         "source": "fallback",
+        "sessionId": session_id,
         "note": "For comprehensive, expert-level answers, please set OPENAI_API_KEY in your .env file"
     }
 
+def sse_event(data: Dict, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+@app.post("/api/chat/stream")
+async def chat_stream_endpoint(payload: ChatMessage):
+    message = payload.message
+    language = payload.language
+    session_id, history = await resolve_session(payload)
+    
+    async def event_stream():
+        cached = response_cache.get(message, language, history) if response_cache else None
+        if cached:
+            await remember_turn(session_id, message, cached)
+            chat_responses.inc("stream", "cache")
+            yield sse_event({"delta": cached})
+            yield sse_event({"type": "ai", "language": language, "source": "cache", "sessionId": session_id}, event="done")
+            return
+        
+        started = time.perf_counter()
+        ttft = None
+        parts = []
+        
+        try:
+            # Relay each upstream delta as soon as it arrives
+            async for delta in stream_ai_response(message, history):
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+                    record_ttft(ttft)
+                parts.append(delta)
+                yield sse_event({"delta": delta})
+        except Exception as e:
+            logger.warning("chat stream interrupted", extra={"error": str(e), "session_id": session_id})
+            if ttft is not None:
+                # Upstream broke mid-answer; the client already has partial
+                # text. No `done` after the error: the answer is incomplete
+                chat_responses.inc("stream", "interrupted")
+                yield sse_event({"error": "stream interrupted"}, event="error")
+                return
+        
+        if ttft is None:
+            # Nothing streamed - answer with the fallback in a single event
+            fallback = get_intelligent_response(message, history)
+            await remember_turn(session_id, message, fallback)
+            chat_responses.inc("stream", "fallback")
+            yield sse_event({"delta": fallback})
+            yield sse_event({"type": "fallback", "language": language, "source": "fallback", "sessionId": session_id}, event="done")
+            return
+        
+        full_response = "".join(parts).strip()
+        await remember_turn(session_id, message, full_response)
+        chat_responses.inc("stream", "openai")
+        if response_cache:
+            response_cache.set(message, language, history, full_response)
+        
+        yield sse_event({
+            "type": "ai",
+            "language": language,
+            "source": "openai",
+            "ttftMs": round(ttft * 1000, 1),
+            "sessionId": session_id
+        }, event="done")
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/chat/session/{session_id}")
+async def get_chat_session(session_id: str):
+    history = await session_call(session_store.get_history, session_id)
+    if history is None:
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    return {"sessionId": session_id, "conversationHistory": history}
+
+@app.delete("/api/chat/session/{session_id}")
+async def clear_chat_session(session_id: str):
+    return {"sessionId": session_id, "cleared": await session_call(session_store.clear, session_id)}
+
+@app.websocket("/ws/pose")
+async def pose_socket(
+    websocket: WebSocket,
+    exercise: str = "chest_press",
+    fps: float = Query(30.0, gt=0, le=MAX_FPS),
+    userId: Optional[str] = None,
+    weight: float = Query(0.0, ge=0, le=MAX_WEIGHT_KG, allow_inf_nan=False)
+):
+    await websocket.accept()
+    try:
+        stream = PoseStream(exercise, fps=fps)
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+    await serve_pose_socket(websocket, stream)
+    # Signed-in users get the set logged to their workout history
+    if userId and stream.rep_log:
+        workout_store.record_session(
+            userId,
+            uuid.uuid4().hex,
+            exercise,
+            stream.started_at,
+            # A rep measured from garbage landmarks keeps its count but not its ROM
+            [(ts, weight, rom if math.isfinite(rom) and 0 <= rom <= MAX_RANGE_OF_MOTION else None) for ts, rom in stream.rep_log]
+        )
+
 if __name__ == "__main__":
+    # Development: `python main.py` (one process; WEB_CONCURRENCY > 1 starts
+    # that many uvicorn workers). Production: run several workers under
+    # gunicorn so a crashed or stuck worker is replaced, e.g.
+    #
+    #   WEB_CONCURRENCY=4 gunicorn main:app -k uvicorn.workers.UvicornWorker -b 0.0.0.0:8000 --graceful-timeout 30
+    #
+    # Set the worker count through WEB_CONCURRENCY (gunicorn uses it as its
+    # -w default) rather than -w: the app reads it to pick its chat session
+    # store and profile cache settings.
+    #
+    # Consecutive turns of one chat can reach different workers, so sessions
+    # must live in the shared sqlite store (CHAT_SESSION_BACKEND=sqlite, the
+    # default when WEB_CONCURRENCY > 1); with per-worker memory sessions chat
+    # context is lost between turns. A profile write only invalidates the
+    # profile cache of the worker that handled it, so that cache is off by
+    # default with several workers (reads go to the database; ETags still
+    # answer 304); a PROFILE_CACHE_TTL_SECONDS set anyway is how long other
+    # workers may serve a stale profile. Response caches and admission limits
+    # stay per worker. Point orchestrator health checks at /ready and liveness
+    # checks at /.
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(
+        "main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        workers=int(os.getenv("WEB_CONCURRENCY", "1"))
+    )
@@ -36,6 +36,7 @@ export default function VoiceChatBot({ theme = 'dark' }: VoiceChatBotProps) {
   const [interimTranscript, setInterimTranscript] = useState('')
   const [hasOpenAI, setHasOpenAI] = useState(false)
   const conversationHistoryRef = useRef<ConversationMessage[]>([])
+  const sessionIdRef = useRef<string | null>(null)
 
   const recognitionRef = useRef<any>(null)
   const synthRef = useRef<SpeechSynthesis | null>(null)
@@ -267,7 +268,9 @@ export default function VoiceChatBot({ theme = 'dark' }: VoiceChatBotProps) {
         body: JSON.stringify({
           message: text,
           language: language,
-          conversationHistory: conversationHistoryRef.current.slice(-10) // Last 10 messages for context
+          // The server keeps the transcript once it has issued a session
+          sessionId: sessionIdRef.current,
+          conversationHistory: sessionIdRef.current ? [] : conversationHistoryRef.current.slice(-11, -1) // Prior messages for context
         }),
       })
 
@@ -276,6 +279,13 @@ export default function VoiceChatBot({ theme = 'dark' }: VoiceChatBotProps) {
       }
 
       const data = await response.json()
+      if (data.sessionId) {
+        // A different id means the server no longer had our session (expired,
+        // or another worker) and answered without context. Drop the id so the
+        // next turn re-seeds a session from the local transcript.
+        const sessionLost = sessionIdRef.current !== null && data.sessionId !== sessionIdRef.current
+        sessionIdRef.current = sessionLost ? null : data.sessionId
+      }
       const botResponse = data.response || data.message || "I'm here to help! What would you like to know about fitness, exercises, or nutrition? 💪"
 
       // Add bot message
@@ -140,6 +140,35 @@ export async function fetchUserProfile(userId: string): Promise<User | null> {
   }
 }
 
+export interface PerformanceRollup {
+  period: string;
+  month?: string;
+  workoutCount: number;
+  reps: number;
+  volume: number;
+  averageRangeOfMotion: number | null;
+}
+
+export interface PerformanceHistory {
+  monthly: PerformanceRollup[];
+  weekly: PerformanceRollup[];
+  daily: PerformanceRollup[];
+}
+
+export async function fetchPerformance(userId: string): Promise<PerformanceHistory | null> {
+  try {
+    const response = await fetch(`${BACKEND_URL}/performance/${userId}`);
+    if (!response.ok) {
+      console.error(`Fetch performance failed: ${response.status}`);
+      return null;
+    }
+    return await response.json();
+  } catch (error) {
+    console.error('Error fetching performance from FastAPI:', error);
+    return null;
+  }
+}
+
 export async function clearUser(): Promise<void> {
   if (typeof window === 'undefined') return;
 
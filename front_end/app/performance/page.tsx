@@ -2,7 +2,7 @@
 
 import { useState, useEffect } from 'react'
 import { useRouter } from 'next/navigation'
-import { getUser, updateUser, User } from '../lib/auth'
+import { getUser, updateUser, fetchPerformance, User, PerformanceRollup } from '../lib/auth'
 import dynamic from 'next/dynamic'
 import Header from '../components/Header'
 
@@ -30,6 +30,7 @@ export default function PerformancePage() {
     const [loading, setLoading] = useState(true)
     const [theme, setTheme] = useState<'dark' | 'light'>('dark')
     const [message, setMessage] = useState('')
+    const [history, setHistory] = useState<PerformanceRollup[] | null>(null)
 
     // Form Local States
     const [weight, setWeight] = useState<string>('')
@@ -56,6 +57,14 @@ export default function PerformancePage() {
         }
         setLoading(false)
 
+        // Logged workouts replace the profile's placeholder data once there are any.
+        // Rollups carry no body weight, so none is shown for those months
+        fetchPerformance(userData.id).then(data => {
+            if (data?.monthly?.length) {
+                setHistory(data.monthly.map(row => ({ ...row, month: row.month || row.period })))
+            }
+        })
+
         const handleUpdate = (event: CustomEvent) => {
             const newUser = event.detail
             if (newUser) {
@@ -221,7 +230,7 @@ export default function PerformancePage() {
                         <h3 className={`text-xl font-black mb-8 ${theme === 'light' ? 'text-gray-900' : 'text-white'}`}>Monthly Progress</h3>
                         <div className="h-64 w-full">
                             <ResponsiveContainer width="100%" height="100%">
-                                <BarChart data={user?.performanceData || generateMockData()}>
+                                <BarChart data={history || user?.performanceData || generateMockData()}>
                                     <XAxis
                                         dataKey="month"
                                         stroke={theme === 'light' ? '#6b7280' : '#4b5563'}
@@ -258,12 +267,33 @@ export default function PerformancePage() {
                                 <thead>
                                     <tr className={`border-b ${theme === 'light' ? 'border-gray-100' : 'border-gray-800'}`}>
                                         <th className="pb-4 text-xs font-black text-gray-400 uppercase tracking-widest">Month</th>
-                                        <th className="pb-4 text-xs font-black text-gray-400 uppercase tracking-widest">Weight</th>
+                                        {history ? (
+                                            <>
+                                                <th className="pb-4 text-xs font-black text-gray-400 uppercase tracking-widest">Volume</th>
+                                                <th className="pb-4 text-xs font-black text-gray-400 uppercase tracking-widest">Avg ROM</th>
+                                            </>
+                                        ) : (
+                                            <th className="pb-4 text-xs font-black text-gray-400 uppercase tracking-widest">Weight</th>
+                                        )}
                                         <th className="pb-4 text-xs font-black text-gray-400 uppercase tracking-widest">Workouts</th>
                                     </tr>
                                 </thead>
                                 <tbody className="divide-y divide-transparent">
-                                    {(user?.performanceData || generateMockData()).map((row, i) => (
+                                    {history && history.map((row, i) => (
+                                        <tr key={i} className="group">
+                                            <td className={`py-4 font-bold ${theme === 'light' ? 'text-gray-700' : 'text-gray-300'}`}>{row.month}</td>
+                                            <td className={`py-4 font-black ${theme === 'light' ? 'text-gray-900' : 'text-white'}`}>{row.volume} kg</td>
+                                            <td className={`py-4 font-black ${theme === 'light' ? 'text-gray-900' : 'text-white'}`}>
+                                                {row.averageRangeOfMotion !== null ? `${row.averageRangeOfMotion}°` : '-'}
+                                            </td>
+                                            <td className="py-4">
+                                                <span className="bg-red-100 text-red-600 px-3 py-1 rounded-full text-xs font-black">
+                                                    {row.workoutCount}
+                                                </span>
+                                            </td>
+                                        </tr>
+                                    ))}
+                                    {!history && (user?.performanceData || generateMockData()).map((row, i) => (
                                         <tr key={i} className="group">
                                             <td className={`py-4 font-bold ${theme === 'light' ? 'text-gray-700' : 'text-gray-300'}`}>{row.month}</td>
                                             <td className={`py-4 font-black ${theme === 'light' ? 'text-gray-900' : 'text-white'}`}>{row.weight} kg</td>